@@ -1,13 +1,71 @@
+import csv
 import time
 import requests
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import threading
+import uuid
+import orjson
 import pandas as pd
-from analyzer import preprocessing, storage
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from analyzer import preprocessing
+from analyzer.io_utils import csv_column_values
 from datetime import datetime
 from tqdm import tqdm
 
 
+# Adaptive rate limiting: a throttled request halves the rate (never below
+# this fraction of the configured rate), a successful one adds this fraction back
+MIN_RATE_FRACTION = 1 / 16
+RATE_RECOVERY_STEP = 0.1
+
+# Longest single wait between retries, whatever the backoff or a server's
+# Retry-After header asks for
+MAX_BACKOFF_SECONDS = 60.0
+
+# Queries whose results come back oldest dispatch date first
+_DISPATCH_DATE_ASC = re.compile(r"\bSORT\s+BY\s+dispatch-date\s+ASC\s*$", re.IGNORECASE)
+
+# For the default fields we make sure to try to not pull any info containing PII
+# (not that it's needed for ML purposes anyway)
+DEFAULT_FIELDS = (
+    "contract-nature",
+    "classification-cpv",
+    "dispatch-date",
+    "tender-value-lowest",
+    "tender-value",
+    "publication-date",
+    "notice-type",
+    "recurrence-lot",
+    "buyer-country",
+    "main-activity",
+    "duration-period-value-lot",
+    "term-performance-lot",
+    "TV_CUR",  # Tender Value Currency
+    "renewal-maximum-lot",
+    "TVH"  # Tender Value Highest
+)
+
+# Log sinks shared by clients writing to the same target, keyed by file path or
+# handler id: [queue, queue handler, listener, owned file handler, ref count,
+# logger]. Each sink has its own logger, so records never reach another sink
+_LOG_SINKS = {}
+_LOG_SINKS_LOCK = threading.Lock()
+
+
+@atexit.register
+def _stop_log_listeners():
+    with _LOG_SINKS_LOCK:
+        for sink in _LOG_SINKS.values():
+            sink[2].stop()
+
+
 class TEDAPIError(Exception):
     """Custom exception for TED API client errors."""
 
@@ -19,10 +77,12 @@ class TEDAPIError(Exception):
 class TEDAPIClient:
     """
     Enhanced Client for TED API v3 (Search API).
-    - Supports retries with backoff
-    - Supports rate limiting
+    - Supports retries with jittered backoff, honouring Retry-After on 429
+    - Supports token-bucket rate limiting with optional bursts, backing off
+      multiplicatively on 429/5xx responses and recovering additively
     - Supports logging of all API interactions
     - Handles graceful exit after max retries
+    - Reuses pooled keep-alive connections across requests
     """
 
     def __init__(self,
@@ -31,7 +91,9 @@ class TEDAPIClient:
                  max_retries: int = 3,
                  backoff_factor: float = 1.5,
                  rate_limit_per_minute: int = 600,
-                 log_file: str = "ted_api_client.log"):
+                 burst: int = 1,
+                 log_file: str = "ted_api_client.log",
+                 log_handler: logging.Handler = None):
 
         self.base_url = base_url or "https://api.ted.europa.eu"
         if self.base_url.endswith("/"):
@@ -40,43 +102,158 @@ class TEDAPIClient:
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
         self.rate_limit_per_minute = rate_limit_per_minute
-        self.min_interval = 60.0 / rate_limit_per_minute
-        self.last_request_time = None
+        # Token bucket: up to `burst` requests go out back-to-back, after which
+        # tokens refill at rate_limit_per_minute / 60 per second
+        self.burst = max(1, burst)
+        self._max_rate_per_sec = rate_limit_per_minute / 60.0
+        self._rate_per_sec = self._max_rate_per_sec
+        self._tokens = float(self.burst)
+        self._last_refill = None
+        self._rate_lock = threading.Lock()
+        self._clock = time.monotonic
 
         self.search_path = "/v3/notices/search"
-        self.logger = self._init_logger(log_file)
+        self.search_url = self.base_url + self.search_path
+        self.logger = self._init_logger(log_file, log_handler)
+        self.session = self._init_session()
 
-    def _init_logger(self, log_file: str):
-        logger = logging.getLogger("TEDAPIClient")
-        logger.setLevel(logging.DEBUG)
-        handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
-        formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        return logger
+    def _init_logger(self, log_file: str, log_handler: logging.Handler = None):
+        """
+        Route this client's log records through a queue to a background thread
+        that owns the actual handler, so requests never wait on log file I/O.
+        """
+        # An explicitly supplied handler replaces the default log file
+        self._log_key = id(log_handler) if log_handler else os.path.abspath(log_file)
+        with _LOG_SINKS_LOCK:
+            sink = _LOG_SINKS.get(self._log_key)
+            if sink is None:
+                sink = [None] * 6
+                logger = logging.getLogger(f"TEDAPIClient.{id(sink)}")
+                logger.setLevel(logging.DEBUG)
+                logger.propagate = False
+                handler = log_handler or logging.FileHandler(
+                    log_file, mode="a", encoding="utf-8")
+                if handler.formatter is None:
+                    formatter = logging.Formatter(
+                        '%(asctime)s %(levelname)s %(message)s')
+                    handler.setFormatter(formatter)
+                log_queue = queue.Queue()
+                queue_handler = logging.handlers.QueueHandler(log_queue)
+                listener = logging.handlers.QueueListener(log_queue, handler)
+                listener.start()
+                logger.addHandler(queue_handler)
+                owned = None if log_handler else handler
+                sink[:] = [log_queue, queue_handler, listener, owned, 0, logger]
+                _LOG_SINKS[self._log_key] = sink
+            sink[4] += 1
+        return sink[5]
+
+    def flush_logs(self):
+        """Block until every queued log record has been written."""
+        sink = _LOG_SINKS.get(self._log_key)
+        if sink is not None:
+            sink[0].join()
+
+    def _release_logger(self):
+        with _LOG_SINKS_LOCK:
+            sink = _LOG_SINKS.get(self._log_key)
+            if sink is None:
+                return
+            sink[4] -= 1
+            if sink[4] == 0:
+                # Last client using this target: detach it from the shared logger
+                del _LOG_SINKS[self._log_key]
+                self.logger.removeHandler(sink[1])
+                sink[2].stop()
+                if sink[3] is not None:
+                    sink[3].close()
+            self._log_key = None
+
+    def _init_session(self):
+        session = requests.Session()
+        # Set once here rather than merged into every request; payloads are
+        # pre-encoded with orjson, so the body type has to be declared explicitly
+        session.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        })
+        # All calls go to a single host; retries are handled by _post_with_retries
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """Close the underlying session and flush and release the log file."""
+        self.session.close()
+        self.flush_logs()
+        self._release_logger()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def _respect_rate_limit(self):
-        if self.last_request_time is None:
-            return
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_interval:
-            sleep_time = self.min_interval - elapsed
-            time.sleep(sleep_time)
+        # Shared by concurrent scrolls; a thread waiting for a token holds the
+        # lock so the others queue up behind it
+        with self._rate_lock:
+            now = self._clock()
+            if self._last_refill is not None:
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last_refill) * self._rate_per_sec)
+            self._last_refill = now
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self._rate_per_sec
+                time.sleep(wait)
+                self._tokens = 1.0
+                self._last_refill = now + wait
+            self._tokens -= 1
+
+    def _adjust_rate(self, throttled: bool):
+        """
+        AIMD control of the request rate: halve it when the server signals
+        overload (429/5xx), and win back a fixed step per successful request
+        until the configured rate is reached again.
+        """
+        with self._rate_lock:
+            if throttled:
+                self._rate_per_sec = max(
+                    self._max_rate_per_sec * MIN_RATE_FRACTION, self._rate_per_sec / 2)
+            else:
+                self._rate_per_sec = min(
+                    self._max_rate_per_sec,
+                    self._rate_per_sec + self._max_rate_per_sec * RATE_RECOVERY_STEP)
+
+    @staticmethod
+    def _retry_after_seconds(response):
+        """Return the Retry-After delay of a 429 response in seconds, if given."""
+        if response.status_code != 429:
+            return None
+        try:
+            return max(0.0, float(response.headers.get("Retry-After")))
+        except (TypeError, ValueError):
+            return None
 
     def _post_with_retries(self, url, payload):
         retries = 0
         retry_delay = self.backoff_factor  # start with base backoff
+        body = orjson.dumps(payload)
         while retries <= self.max_retries:
+            retry_after = None
             try:
                 self._respect_rate_limit()
-                response = requests.post(
-                    url, json=payload, timeout=self.timeout)
-                self.last_request_time = time.time()
+                response = self.session.post(
+                    url, data=body, timeout=self.timeout)
                 if response.ok:
-                    self._log_success(url, response, payload)
+                    self._adjust_rate(throttled=False)
                     return response
                 else:
                     self._log_error(url, response, payload)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        self._adjust_rate(throttled=True)
+                    retry_after = self._retry_after_seconds(response)
                     error_msg = response.text
                     if response.headers.get("Content-Type", "").startswith("text/html"):
                         error_msg = f"HTTP {response.status_code}: HTML error page received"
@@ -87,17 +264,21 @@ class TEDAPIClient:
                 if retries > self.max_retries:
                     self.logger.error(f"Max retries exceeded: {str(e)}")
                     raise TEDAPIError(f"Max retries exceeded: {str(e)}") from e
-                sleep = retry_delay
+                # Honour the server's Retry-After; otherwise jitter the backoff so
+                # concurrent clients do not retry in lockstep
+                if retry_after is not None:
+                    sleep = retry_after
+                else:
+                    sleep = retry_delay * random.uniform(0.5, 1.5)
+                sleep = min(sleep, MAX_BACKOFF_SECONDS)
                 self.logger.warning(
                     f"Retry {retries}/{self.max_retries} after error: {str(e)} (waiting {sleep:.2f}s)")
                 time.sleep(sleep)
                 retry_delay *= 2  # exponential backoff
 
-    def _log_success(self, url, response, payload):
-        try:
-            notices = len(response.json().get("notices", []))
-        except Exception:
-            notices = "unknown"
+    def _log_success(self, url, data):
+        notices = len(data.get("notices", [])) if isinstance(
+            data, dict) else "unknown"
         self.logger.info(f"SUCCESS: {url} - Retrieved {notices} notices")
 
     def _log_error(self, url, response, payload):
@@ -109,6 +290,39 @@ class TEDAPIClient:
         self.logger.error(
             f"Error: {url} - Status {response.status_code} - {body}")
 
+    def _write_checkpoint(self, checkpoint_file: str, token: str, output_size: int = None):
+        """
+        Atomically replace the checkpoint file with the given token and, on a
+        second line, the number of bytes of streamed output holding whole records.
+        """
+        temp_path = checkpoint_file + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(token)
+                if output_size is not None:
+                    f.write(f"\n{output_size}")
+            os.replace(temp_path, checkpoint_file)
+        except Exception as e:
+            self.logger.error(f"Failed to write checkpoint file: {e}")
+
+    @staticmethod
+    def _flushed_size(handle) -> int:
+        """Flush an output handle and return the size of its file on disk."""
+        handle.flush()
+        return os.fstat(handle.fileno()).st_size
+
+    @staticmethod
+    def _max_dispatch_date(notices) -> str:
+        """Return the latest dispatch date of the given notices as YYYYMMDD, if any."""
+        # Dates are ISO-formatted (optionally with a UTC offset), so comparing
+        # the leading YYYY-MM-DD part as strings is enough
+        dates = [d[:10] for d in (n.get("dispatch-date") for n in notices)
+                 if isinstance(d, str) and len(d) >= 10]
+        if not dates:
+            return None
+        latest = max(dates).replace("-", "")
+        return latest if latest.isdigit() else None
+
     def build_query(self, start_date: str, end_date: str, additional_filters: str = None) -> str:
         """
         Build the search query string for TED API based on date range and optional filters.
@@ -118,28 +332,205 @@ class TEDAPIClient:
             return f"({base_query}) AND ({additional_filters})"
         return base_query
 
+    @staticmethod
+    def _output_columns(notices, fields=()):
+        """
+        Column names for saving notices, minus 'links': publication-number and
+        the given fields first, then any other keys found in the notices.
+        Scrolls pass the requested fields, so a field absent from the first page
+        still gets a column.
+        """
+        return list(dict.fromkeys(
+            key for key in ("publication-number", *fields,
+                            *(key for notice in notices for key in notice))
+            if key != "links"))
+
+    @staticmethod
+    def _csv_writer(handle, fieldnames):
+        """
+        csv.DictWriter for saved notices. Quoting is minimal and lines end in
+        newlines, as in the files DataFrame.to_csv used to write.
+        """
+        return csv.DictWriter(handle, fieldnames=fieldnames,
+                              extrasaction="ignore", lineterminator="\n")
+
+    @staticmethod
+    def _open_csv_writer(output_file: str, columns):
+        """
+        Open output_file for appending and return (handle, csv.DictWriter).
+        Columns come from the existing header when resuming, otherwise from
+        the given column names, in which case the header is written.
+        """
+        fieldnames = None
+        if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            with open(output_file, "r", newline="", encoding="utf-8") as f:
+                fieldnames = next(csv.reader(f), None)
+        write_header = not fieldnames
+        if write_header:
+            fieldnames = columns
+        handle = open(output_file, "a", newline="",
+                      encoding="utf-8", buffering=1 << 20)
+        writer = TEDAPIClient._csv_writer(handle, fieldnames)
+        if write_header:
+            writer.writeheader()
+        return handle, writer
+
+    @staticmethod
+    def _open_json_writer(output_file: str):
+        """
+        Open output_file for streaming notices into a JSON array.
+        An array left by an interrupted run is reopened so records can be
+        appended to it. Returns (handle, has_items).
+        """
+        if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            handle = open(output_file, "wb", buffering=1 << 20)
+            handle.write(b"[")
+            return handle, False
+
+        handle = open(output_file, "r+b", buffering=1 << 20)
+
+        def last_char(end):
+            # Step back over trailing whitespace; returns (byte, position)
+            while end > 0:
+                handle.seek(end - 1)
+                char = handle.read(1)
+                if not char.isspace():
+                    return char, end - 1
+                end -= 1
+            return b"", 0
+
+        char, pos = last_char(handle.seek(0, os.SEEK_END))
+        if char == b"]":
+            char, pos = last_char(pos)
+        handle.seek(pos + 1)
+        handle.truncate()
+        return handle, char != b"["
+
+    @staticmethod
+    def _text_schema(columns):
+        """All-string Arrow schema with the given column names."""
+        # pyarrow is imported where it is used, so CLI startup and scrolls to
+        # CSV/JSON never load it
+        import pyarrow as pa
+        return pa.schema([(name, pa.string()) for name in columns])
+
+    @staticmethod
+    def _notices_to_arrow(notices, schema):
+        """Build an all-string Arrow table, rendering values the way the CSV writer does."""
+        import pyarrow as pa
+        return pa.Table.from_pydict(
+            {name: [None if n.get(name) is None else str(n.get(name)) for n in notices]
+             for name in schema.names},
+            schema=schema)
+
+    @staticmethod
+    def _open_parquet_writer(output_file: str, columns):
+        """
+        Open a ParquetWriter on a temporary file next to output_file and return
+        (writer, schema, temp_path). The caller moves the temporary file over
+        output_file once the writer is closed.
+        Parquet files cannot be appended to, so when output_file already holds
+        an earlier run its row groups are copied over first.
+        """
+        import pyarrow.parquet as pq
+        temp_path = output_file + ".part"
+        existing = None
+        if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
+            existing = pq.ParquetFile(output_file)
+            schema = existing.schema_arrow
+        else:
+            schema = TEDAPIClient._text_schema(columns)
+        writer = pq.ParquetWriter(temp_path, schema, compression="zstd")
+        if existing is not None:
+            for i in range(existing.num_row_groups):
+                writer.write_table(existing.read_row_group(i))
+            existing.close()
+        return writer, schema, temp_path
+
+    def _write_partitions(self, notices, output_dir: str, schema, partition_by: str,
+                          tag: str, touched: set):
+        """
+        Append notices to a year/month partitioned Parquet dataset under
+        output_dir, using the first seven characters (YYYY-MM) of the
+        partition_by field; notices without a usable date go to
+        year=unknown/month=unknown. Files are named after tag, so earlier
+        writes are never replaced. The partitions written to are added to touched.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        dates = [str(n.get(partition_by) or "") for n in notices]
+        years = [d[:4] if len(d) >= 7 else "unknown" for d in dates]
+        months = [d[5:7] if len(d) >= 7 else "unknown" for d in dates]
+        touched.update(zip(years, months))
+
+        table = self._notices_to_arrow(notices, schema)
+        table = table.append_column("year", pa.array(years, pa.string()))
+        table = table.append_column("month", pa.array(months, pa.string()))
+        ds.write_dataset(
+            table, output_dir, format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([("year", pa.string()), ("month", pa.string())]),
+                flavor="hive"),
+            basename_template=f"part-{tag}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression="zstd"))
+
+    def _saved_publication_ids(self, output_file: str, output_format: str) -> set:
+        """
+        Collect the publication numbers already present in a CSV or Parquet
+        output (file or partitioned directory), reading only that column.
+        """
+        column = "publication-number"
+        try:
+            if output_format == "csv":
+                return csv_column_values(output_file, column)
+            if output_format == "parquet" and os.path.exists(output_file):
+                import pyarrow.dataset as ds
+                dataset = ds.dataset(output_file, format="parquet")
+                if column in dataset.schema.names:
+                    return set(dataset.to_table(columns=[column])
+                               .column(column).to_pylist())
+        except Exception as e:
+            self.logger.error(f"Failed to read saved publication numbers: {e}")
+        return set()
+
+    def save_notices_as_parquet(self, notices, output_file: str):
+        """Save notices to a Parquet file with every column stored as text."""
+        if not notices:
+            self.logger.warning(f"No notices to save to {output_file}")
+            return
+        import pyarrow.parquet as pq
+        schema = self._text_schema(self._output_columns(notices))
+        pq.write_table(self._notices_to_arrow(notices, schema), output_file,
+                       compression="zstd")
+        self.logger.info(
+            f"Saved {len(notices)} notices to Parquet: {output_file}")
+
     def save_notices_as_csv(self, notices, output_file: str, append: bool = False):
         """Save notices to a CSV file, append if needed."""
         if not notices:
             self.logger.warning(f"No notices to save to {output_file}")
             return
-        df = pd.DataFrame(notices)
-        if "links" in df.columns:
-            df.drop(columns=["links"], inplace=True)
-        write_mode = "a" if append else "w"
-        header = not append
-        df.to_csv(output_file, mode=write_mode, header=header,
-                  index=False, encoding="utf-8")
-        self.logger.info(f"Saved {len(df)} notices to CSV: {output_file}")
+        # Same writer as scroll output, so both fetch modes produce identical
+        # files; pyarrow's CSV writer would quote every string field
+        with open(output_file, "a" if append else "w", newline="",
+                  encoding="utf-8", buffering=1 << 20) as f:
+            writer = self._csv_writer(f, self._output_columns(notices))
+            if not append:
+                writer.writeheader()
+            writer.writerows(notices)
+        self.logger.info(f"Saved {len(notices)} notices to CSV: {output_file}")
 
     def save_notices_as_json(self, notices, output_file: str):
         """Save notices to a JSON file."""
         if not notices:
             self.logger.warning(f"No notices to save to {output_file}")
             return
-        with open(output_file, "w", encoding="utf-8") as f:
-            import json
-            json.dump(notices, f, indent=2, ensure_ascii=False)
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(notices, option=orjson.OPT_INDENT_2
+                                 | orjson.OPT_APPEND_NEWLINE
+                                 | orjson.OPT_NON_STR_KEYS))
         self.logger.info(
             f"Saved {len(notices)} notices to JSON: {output_file}")
 
@@ -155,37 +546,21 @@ class TEDAPIClient:
             "paginationMode": pagination_mode,
             "onlyLatestVersions": True
         }
-        if fields is None:
-            # For the default fields we make sure to try to not pull any info containing PII
-            # (not that it's needed for ML purposes anyway)
-            fields = [
-                "contract-nature",
-                "classification-cpv",
-                "dispatch-date",
-                "tender-value-lowest",
-                "tender-value",
-                "publication-date",
-                "notice-type",
-                "recurrence-lot",
-                "buyer-country",
-                "main-activity",
-                "duration-period-value-lot",
-                "term-performance-lot",
-                "TV_CUR",  # Tender Value Currency
-                "renewal-maximum-lot",
-                "TVH"  # Tender Value Highest
-            ]
-        payload["fields"] = fields
+        # orjson encodes the tuple as a JSON array, so no per-call list copy is needed
+        payload["fields"] = DEFAULT_FIELDS if fields is None else fields
         if pagination_mode == "ITERATION" and iteration_token:
             payload["iterationNextToken"] = iteration_token
 
-        url = self.base_url + self.search_path
+        url = self.search_url
         response = self._post_with_retries(url, payload)
 
+        # The body is decoded exactly once; the success log reuses the result
         try:
-            return response.json()
+            data = orjson.loads(response.content)
         except ValueError as e:
             raise TEDAPIError(f"Invalid JSON in response: {e}") from e
+        self._log_success(url, data)
+        return data
 
     def fetch_all_scroll(
         self,
@@ -193,22 +568,45 @@ class TEDAPIClient:
         fields: list = None,
         limit: int = 250,
         checkpoint_file: str = ".token",
+        checkpoint_interval: int = 10,
         output_file: str = None,
         output_format: str = "csv",
         store_db: bool = False,
         db_options: dict = None,
         progress_start_date: str = None,
-        progress_end_date: str = None
-    ) -> list:
+        progress_end_date: str = None,
+        progress_callback=None,
+        return_results: bool = True,
+        partition_by: str = None
+    ):
         """
         Fetch all available notices using scroll (iteration) mode.
 
         Supports:
-        - Crash recovery with checkpoint token
-        - Incremental saving to CSV or JSON
+        - Crash recovery with a checkpoint token, written atomically every
+          checkpoint_interval pages and whenever the scroll is interrupted.
+          Single-file Parquet output is only readable once closed, so there the
+          token is written only on interruption, after the file is in place.
+          For CSV and JSON the checkpoint also records how much of the file
+          held whole records; a resumed run cuts the file back to that size,
+          dropping any record a crash left half-written
+        - Incremental saving to CSV, JSON (streamed as a JSON array) or Parquet
+          (text columns, zstd-compressed, finalized when the scroll ends)
+        - With Parquet and partition_by (e.g. "publication-date"), writing a
+          dataset directory partitioned by year and month of that field
         - Streaming to PostgreSQL with optional preprocessing
+        - Reporting progress through progress_callback, which is called with the
+          latest dispatch date (YYYYMMDD) of each page once it is on disk. This
+          only happens when the query ends in "SORT BY dispatch-date ASC", since
+          otherwise later pages may still hold older notices, and never for
+          single-file Parquet output, which is only readable once closed
+
+        Returns the list of fetched notices, or only their count when
+        return_results is False (so large scrolls are not held in memory).
         """
         all_notices = []
+        notice_count = 0
+        requested_fields = DEFAULT_FIELDS if fields is None else fields
         seen_pub_ids = set()
         iteration_token = None
         duplicate_batch_streak = 0
@@ -237,115 +635,254 @@ class TEDAPIClient:
             pbar = None
 
         resuming_from_checkpoint = False
+        output_size = None
         if os.path.exists(checkpoint_file):
             try:
                 with open(checkpoint_file, "r", encoding="utf-8") as f:
-                    iteration_token = f.read().strip()
+                    iteration_token, _, saved_size = f.read().strip().partition("\n")
+                output_size = int(saved_size) if saved_size else None
                 self.logger.warning(
                     f"Resuming scroll from saved checkpoint token: {iteration_token}...")
                 resuming_from_checkpoint = True
             except Exception as e:
                 self.logger.error(f"Failed to read checkpoint file: {e}")
 
-        if output_file and not resuming_from_checkpoint and os.path.exists(output_file) and output_format == "csv":
+        partitioned = bool(output_file and output_format == "parquet" and partition_by)
+        if output_file and not resuming_from_checkpoint and os.path.exists(output_file) and output_format in ("csv", "json", "parquet") and not partition_by:
             try:
                 os.remove(output_file)
                 self.logger.info(
                     f"Deleted previous output file {output_file} (fresh retrieval)")
             except Exception as e:
                 self.logger.error(f"Failed to delete output file: {e}")
-
-        first_batch = not os.path.exists(output_file) if output_file else False
-
-        while True:
-            batch_count += 1
-
-            response = self.search_notices(
+        elif output_file and (resuming_from_checkpoint or partitioned):
+            # Drop whatever the interrupted run wrote after its checkpoint; those
+            # pages are fetched again, and the last record may be torn
+            if (resuming_from_checkpoint and output_size is not None
+                    and output_format in ("csv", "json")
+                    and os.path.exists(output_file)
+                    and os.path.getsize(output_file) > output_size):
+                with open(output_file, "r+b") as f:
+                    f.truncate(output_size)
+                self.logger.warning(
+                    f"Truncated {output_file} to the {output_size} bytes saved "
+                    f"at the last checkpoint")
+            # Skip notices already saved, either by the interrupted run (e.g.
+            # pages fetched after its last checkpoint) or, for a partitioned
+            # dataset that is only ever appended to, by earlier fetches
+            seen_pub_ids.update(
+                self._saved_publication_ids(output_file, output_format))
+            if output_format == "csv":
+                self.logger.info(
+                    f"Appending to {output_file}, which already holds "
+                    f"{len(seen_pub_ids)} notices")
+
+        # One buffered handle for the whole scroll instead of a reopen per page,
+        # so neither format has to hold every notice until the end
+        csv_file = None
+        csv_writer = None
+        json_file = None
+        json_has_items = False
+        json_count = 0
+        parquet_writer = None
+        parquet_schema = None
+        parquet_temp = None
+        parquet_count = 0
+        single_parquet = bool(output_file and output_format == "parquet" and not partition_by)
+        touched_partitions = set()
+        run_tag = uuid.uuid4().hex[:8]
+        pages_since_checkpoint = 0
+        completed = False
+        report_progress = bool(
+            progress_callback and _DISPATCH_DATE_ASC.search(query) and not single_parquet)
+
+        def fetch_page(page_token):
+            return self.search_notices(
                 query=query,
                 fields=fields,
                 page=1,
                 limit=limit,
                 pagination_mode="ITERATION",
-                iteration_token=iteration_token
+                iteration_token=page_token
             )
-            notices = response.get("notices", [])
-            token = response.get("iterationNextToken")
-            pub_ids = [n.get("publication-number") for n in notices]
 
-            self.logger.info(
-                f"Scroll batch {batch_count}: {len(notices)} notices, token={token if token else 'None'}")
+        # Each page's token is only known once it arrives, so pages are still
+        # requested one at a time, but the next request is in flight while the
+        # current page is being written out or stored
+        prefetcher = ThreadPoolExecutor(max_workers=1)
+        next_page = prefetcher.submit(fetch_page, iteration_token)
+
+        try:
+            while True:
+                batch_count += 1
 
-            if not notices:
-                self.logger.warning("Empty scroll batch detected — aborting")
-                break
+                response = next_page.result()
+                next_page = None
+                notices = response.get("notices", [])
+                token = response.get("iterationNextToken")
+                pub_ids = [n.get("publication-number") for n in notices]
 
-            if token is None or not isinstance(token, str) or not token.strip():
-                self.logger.error(
-                    "Invalid or empty iteration token received — aborting")
-                print("ERROR: Invalid iteration token received. Check logs. Aborting.")
-                break
+                self.logger.info(
+                    f"Scroll batch {batch_count}: {len(notices)} notices, token={token if token else 'None'}")
 
-            if last_batch_ids is not None and pub_ids == last_batch_ids:
-                duplicate_batch_streak += 1
-                self.logger.warning(
-                    f"Duplicate batch detected (#{duplicate_batch_streak}) with IDs: {pub_ids}")
-                if duplicate_batch_streak >= 2:
+                if not notices:
+                    self.logger.warning("Empty scroll batch detected — aborting")
+                    break
+
+                if token is None or not isinstance(token, str) or not token.strip():
                     self.logger.error(
-                        "Detected 2 consecutive duplicate batches — aborting scroll")
+                        "Invalid or empty iteration token received — aborting")
+                    print("ERROR: Invalid iteration token received. Check logs. Aborting.")
                     break
-            else:
-                duplicate_batch_streak = 0
-
-            batch_data = []
-            for notice in notices:
-                pub_id = notice.get("publication-number")
-                if pub_id not in seen_pub_ids:
-                    all_notices.append(notice)
-                    seen_pub_ids.add(pub_id)
-                    batch_data.append(notice)
-
-            if pbar:
-                pub_dates = [n.get("publication-date", "")
-                             for n in batch_data if n.get("publication-date")]
-                estimates = [estimate_progress(d) for d in pub_dates]
-                if estimates:
-                    current_estimate = max(estimates)
-                    if current_estimate >= 1.0:
-                        current_estimate = 0.99  # prevent premature 100%
-                    delta = current_estimate - last_progress
-                    if delta > 0:
-                        pbar.update(delta)
-                        last_progress = current_estimate
-
-            if output_file and output_format == "csv" and batch_data:
-                self.save_notices_as_csv(
-                    batch_data, output_file, append=not first_batch)
-                first_batch = False
-
-            # Save to DB (incremental, with optional preprocessing)
-            if store_db and batch_data:
-                df = pd.DataFrame(batch_data)
-                if db_options.get("preprocess", True):
+
+                if last_batch_ids is not None and pub_ids == last_batch_ids:
+                    duplicate_batch_streak += 1
+                    self.logger.warning(
+                        f"Duplicate batch detected (#{duplicate_batch_streak}) with IDs: {pub_ids}")
+                    if duplicate_batch_streak >= 2:
+                        self.logger.error(
+                            "Detected 2 consecutive duplicate batches — aborting scroll")
+                        break
+                else:
+                    duplicate_batch_streak = 0
+
+                next_page = prefetcher.submit(fetch_page, token)
+
+                batch_data = []
+                for notice in notices:
+                    pub_id = notice.get("publication-number")
+                    if pub_id not in seen_pub_ids:
+                        if return_results:
+                            all_notices.append(notice)
+                        seen_pub_ids.add(pub_id)
+                        batch_data.append(notice)
+                notice_count += len(batch_data)
+
+                if pbar:
+                    pub_dates = [n.get("publication-date", "")
+                                 for n in batch_data if n.get("publication-date")]
+                    estimates = [estimate_progress(d) for d in pub_dates]
+                    if estimates:
+                        current_estimate = max(estimates)
+                        if current_estimate >= 1.0:
+                            current_estimate = 0.99  # prevent premature 100%
+                        delta = current_estimate - last_progress
+                        if delta > 0:
+                            pbar.update(delta)
+                            last_progress = current_estimate
+
+                if output_file and output_format == "csv" and batch_data:
+                    if csv_writer is None:
+                        csv_file, csv_writer = self._open_csv_writer(
+                            output_file,
+                            self._output_columns(batch_data, requested_fields))
+                    csv_writer.writerows(batch_data)
+                    self.logger.info(
+                        f"Saved {len(batch_data)} notices to CSV: {output_file}")
+
+                if output_file and output_format == "json" and batch_data:
+                    if json_file is None:
+                        json_file, json_has_items = self._open_json_writer(
+                            output_file)
+                    for notice in batch_data:
+                        json_file.write(b",\n" if json_has_items else b"\n")
+                        json_file.write(orjson.dumps(notice))
+                        json_has_items = True
+                    json_count += len(batch_data)
+
+                if partitioned and batch_data:
+                    if parquet_schema is None:
+                        parquet_schema = self._text_schema(
+                            self._output_columns(batch_data, requested_fields))
+                    self._write_partitions(
+                        batch_data, output_file, parquet_schema, partition_by,
+                        f"{run_tag}-{batch_count}", touched_partitions)
+                    parquet_count += len(batch_data)
+                elif output_file and output_format == "parquet" and batch_data:
+                    if parquet_writer is None:
+                        parquet_writer, parquet_schema, parquet_temp = \
+                            self._open_parquet_writer(
+                                output_file,
+                                self._output_columns(batch_data, requested_fields))
+                    parquet_writer.write_table(
+                        self._notices_to_arrow(batch_data, parquet_schema))
+                    parquet_count += len(batch_data)
+
+                # Save to DB (incremental, with optional preprocessing)
+                committed = True
+                if store_db and batch_data:
+                    # Imported here so scrolls to files never load psycopg2
+                    from analyzer import storage
+                    df = pd.DataFrame(batch_data)
+                    if db_options.get("preprocess", True):
+                        try:
+                            df = preprocessing.preprocess_notices(df)
+                        except Exception as e:
+                            self.logger.error(f"Preprocessing failed: {e}")
+                            continue  # skip this batch
                     try:
-                        df = preprocessing.preprocess_notices(df)
+                        storage.store_dataframe_to_postgres(
+                            df, db_options["table"], db_options["config"])
                     except Exception as e:
-                        self.logger.error(f"Preprocessing failed: {e}")
-                        continue  # skip this batch
-                try:
-                    storage.store_dataframe_to_postgres(
-                        df, db_options["table"], db_options["config"])
-                except Exception as e:
-                    self.logger.error(f"Database insert failed: {e}")
-
-            iteration_token = token
-            last_batch_ids = pub_ids
-            try:
-                with open(checkpoint_file, "w", encoding="utf-8") as f:
-                    f.write(iteration_token)
-            except Exception as e:
-                self.logger.error(f"Failed to write checkpoint file: {e}")
-
-            time.sleep(0.6)
+                        self.logger.error(f"Database insert failed: {e}")
+                        committed = False
+
+                if report_progress and committed:
+                    page_date = self._max_dispatch_date(batch_data)
+                    if page_date:
+                        # The reported date must never name records still buffered
+                        if csv_file is not None:
+                            csv_file.flush()
+                        if json_file is not None:
+                            json_file.flush()
+                        progress_callback(page_date)
+
+                iteration_token = token
+                last_batch_ids = pub_ids
+                pages_since_checkpoint += 1
+                # The checkpoint must never get ahead of the records on disk, and
+                # pages in the unfinished .part file of a Parquet writer are not
+                if pages_since_checkpoint >= checkpoint_interval and not single_parquet:
+                    stream = csv_file or json_file
+                    if stream is not None:
+                        output_size = self._flushed_size(stream)
+                    self._write_checkpoint(
+                        checkpoint_file, iteration_token, output_size)
+                    pages_since_checkpoint = 0
+            completed = True
+        finally:
+            # On failure, report it now rather than after the in-flight request,
+            # which can take up to max_retries timeouts
+            if next_page is not None:
+                next_page.cancel()
+            prefetcher.shutdown(wait=completed)
+            stream = csv_file or json_file
+            if stream is not None:
+                # Measured before the JSON array is closed, so a resumed run
+                # can append after the last record
+                output_size = self._flushed_size(stream)
+            if csv_file is not None:
+                csv_file.close()
+            if json_file is not None:
+                json_file.write(b"\n]\n")
+                json_file.close()
+                self.logger.info(
+                    f"Saved {json_count} notices to JSON: {output_file}")
+            if partitioned and parquet_count:
+                self.logger.info(
+                    f"Saved {parquet_count} notices to {len(touched_partitions)} "
+                    f"Parquet partitions under {output_file}")
+            if parquet_writer is not None:
+                # The footer is only written on close, so the file is moved into
+                # place afterwards and output_file is never left unreadable
+                parquet_writer.close()
+                os.replace(parquet_temp, output_file)
+                self.logger.info(
+                    f"Saved {parquet_count} notices to Parquet: {output_file}")
+            # Interrupted: record how far we got now that the output is closed
+            if not completed and pages_since_checkpoint:
+                self._write_checkpoint(
+                    checkpoint_file, iteration_token, output_size)
 
         if pbar:
             pbar.update(1.0 - last_progress)
@@ -359,7 +896,34 @@ class TEDAPIClient:
             except Exception as e:
                 self.logger.error(f"Failed to delete checkpoint file: {e}")
 
-        if output_file and output_format == "json":
-            self.save_notices_as_json(all_notices, output_file)
+        self.flush_logs()
+        return all_notices if return_results else notice_count
 
-        return all_notices
+    @staticmethod
+    def _suffixed_path(path: str, index: int) -> str:
+        """Insert the query index before the extension: notices.csv -> notices.1.csv."""
+        root, ext = os.path.splitext(path)
+        return f"{root}.{index}{ext}"
+
+    def fetch_many_scroll(self, queries: list, max_workers: int = 4,
+                          checkpoint_file: str = ".token", output_file: str = None,
+                          **kwargs) -> dict:
+        """
+        Run fetch_all_scroll for several distinct queries concurrently.
+
+        All scrolls share this client's connection pool and rate limit. Each
+        query gets its own checkpoint and output file, suffixed with its
+        position in queries. Remaining keyword arguments are passed to
+        fetch_all_scroll. Returns a dict mapping each query to its result.
+        """
+        def run(index, query):
+            return self.fetch_all_scroll(
+                query=query,
+                checkpoint_file=self._suffixed_path(checkpoint_file, index),
+                output_file=output_file and self._suffixed_path(output_file, index),
+                **kwargs)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {query: executor.submit(run, i, query)
+                       for i, query in enumerate(queries)}
+        return {query: future.result() for query, future in futures.items()}
@@ -0,0 +1,18 @@
+import csv
+
+
+def csv_column_values(path: str, column: str) -> set:
+    """
+    Return the distinct values of one CSV column, streaming the file row by row.
+    Returns an empty set for a missing file or a file without that column.
+    """
+    try:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header or column not in header:
+                return set()
+            index = header.index(column)
+            return {row[index] for row in reader if len(row) > index}
+    except FileNotFoundError:
+        return set()
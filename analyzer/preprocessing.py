@@ -1,7 +1,7 @@
+import ast
+import numpy as np
 import pandas as pd
 import logging
-import re
-import ast
 
 # Configure logging
 logger = logging.getLogger("Preprocessing")
@@ -11,11 +11,24 @@ formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+NUMERIC_COLUMNS = ['tender-value', 'TVH', 'tender-value-lowest']
+
+# A stringified list of plain quoted strings, e.g. "['works', 'services']",
+# capturing its first item. Anything fancier is left to ast.literal_eval
+_FIRST_ITEM = r"""(?:'([^'\\\r\n\x00]*)'|"([^"\\\r\n\x00]*)")"""
+_NEXT_ITEM = r"""(?:'[^'\\\r\n\x00]*'|"[^"\\\r\n\x00]*")"""
+SIMPLE_LIST_PATTERN = (r"^[ \t]*\[[ \t\n]*" + _FIRST_ITEM
+                       + r"(?:[ \t\n]*,[ \t\n]*" + _NEXT_ITEM + r")*"
+                       + r"[ \t\n]*,?[ \t\n]*\][ \t\n]*$")
+
 
 def preprocess_notices(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        # Nothing to clean; skip building the intermediate empty frames
+        logger.warning("No notices to preprocess.")
+        return df.copy()
     try:
-        required = ['tender-value', 'TVH', 'tender-value-lowest']
-        df = insert_missing_columns(df, required)
+        df = insert_missing_columns(df, NUMERIC_COLUMNS)
         df = handle_missing_values(df)
         df = convert_data_types(df)
         df = handle_categorical_data(df)
@@ -41,10 +54,10 @@ def handle_missing_values(df):
     df = df.fillna(value=pd.NA)
 
     # Convert specific columns to appropriate dtypes before filling missing values
-    for col in ['tender-value', 'TVH', 'tender-value-lowest']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            df[col] = df[col].fillna(0)
+    numeric_cols = [col for col in NUMERIC_COLUMNS if col in df.columns]
+    if numeric_cols:
+        df[numeric_cols] = df[numeric_cols].apply(
+            pd.to_numeric, errors='coerce').fillna(0)
 
     return df
 
@@ -56,43 +69,73 @@ def convert_data_types(df):
             # Strip timezone manually before parsing
             df[col] = df[col].astype(str).str.split(
                 '+', n=1).str[0].str.replace('Z', '', regex=False)
-            df[col] = pd.to_datetime(df[col], errors='coerce')
+            df[col] = pd.to_datetime(
+                df[col], format='ISO8601', errors='coerce', cache=True)
             df[col] = df[col].dt.tz_localize(None)
     return df
 
 
 def handle_categorical_data(df, top_n=10):
-    categorical_columns = ['notice-type',
-                           'contract-nature', 'main-activity', 'buyer-country']
+    categorical_columns = [col for col in ['notice-type', 'contract-nature', 'main-activity', 'buyer-country']
+                           if col in df.columns]
 
     for col in categorical_columns:
-        if col not in df.columns:
-            continue
-
-        def extract_first(val):
-            if isinstance(val, str):
-                try:
-                    # Try parsing stringified list: e.g. "['works', 'services']"
-                    parsed = ast.literal_eval(val)
-                    if isinstance(parsed, list) and parsed:
-                        return str(parsed[0])
-                except Exception:
-                    pass
-                # If it’s a clean string, return as-is
-                return val.strip()
-            return "Others"  # fallback
-
-        df[col] = df[col].apply(extract_first)
+        df[col] = extract_first_category(df[col])
 
         # Simplify any outliers
         top_categories = df[col].value_counts().index[:top_n]
-        df[col] = df[col].apply(
-            lambda x: x if x in top_categories else "Others")
+        # At most top_n + 1 distinct values remain, so encode them as a
+        # categorical and let get_dummies work off the integer codes
+        df[col] = df[col].where(
+            df[col].isin(top_categories), "Others").astype("category")
 
     df = pd.get_dummies(df, columns=categorical_columns, dummy_na=False)
     return df
 
 
+def _first_category(val):
+    """Row-wise reduction of one value; see extract_first_category."""
+    if isinstance(val, str):
+        try:
+            # Try parsing stringified list: e.g. "['works', 'services']"
+            parsed = ast.literal_eval(val)
+            if isinstance(parsed, list) and parsed:
+                return str(parsed[0])
+        except Exception:
+            pass
+        # If it's a clean string, return as-is
+        return val.strip()
+    return "Others"  # fallback
+
+
+def extract_first_category(series):
+    """
+    Reduce each value to a single category: the first item of a stringified
+    list (e.g. "['works', 'services']"), or the stripped string itself.
+    Anything that is not a string, lists included, becomes "Others".
+    """
+    values = series.to_numpy(dtype=object)
+    result = np.full(len(values), "Others", dtype=object)
+    is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool,
+                         count=len(values))
+    if not is_str.any():
+        return pd.Series(result, index=series.index, name=series.name)
+
+    strings = pd.Series(values[is_str], dtype=object)
+    items = strings.str.extract(SIMPLE_LIST_PATTERN)
+    first = items[0].fillna(items[1]).to_numpy(dtype=object, copy=True)
+    # Only a string containing "[" can evaluate to a list
+    listed = strings.str.contains("[", regex=False).to_numpy(dtype=bool)
+    plain = ~listed
+    first[plain] = strings[plain].str.strip().to_numpy(dtype=object)
+    # Lists the pattern does not cover go through ast.literal_eval as before
+    unparsed = listed & pd.isna(first)
+    first[unparsed] = [_first_category(v) for v in strings[unparsed]]
+
+    result[is_str] = first
+    return pd.Series(result, index=series.index, name=series.name)
+
+
 def remove_irrelevant_columns(df):
     # We cannot drop 'publication-number' due to requirements regarding traceability of notices back to the original TED API.
     columns_to_drop = [
@@ -105,12 +148,17 @@ def remove_irrelevant_columns(df):
 
 
 def impute_numerics(df):
-    for col in ['tender-value', 'TVH', 'tender-value-lowest']:
+    for col in NUMERIC_COLUMNS:
         if col not in df.columns:
             logger.warning(
                 f"Missing column '{col}' — inserting default values.")
             df[col] = 0.0
-        else:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            df[col] = df[col].fillna(df[col].mean())
+    # After handle_missing_values these columns are usually numeric and
+    # complete already, so only coerce/fill when there is work to do
+    numeric = df[NUMERIC_COLUMNS]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in numeric.dtypes):
+        numeric = numeric.apply(pd.to_numeric, errors='coerce')
+    if numeric.isna().to_numpy().any():
+        numeric = numeric.fillna(numeric.mean())
+    df[NUMERIC_COLUMNS] = numeric
     return df
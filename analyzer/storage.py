@@ -1,5 +1,11 @@
+import atexit
+import csv
+import io
 import logging
+import threading
 import psycopg2
+import psycopg2.pool
+from itertools import islice
 from psycopg2.extras import execute_values
 import pandas as pd
 
@@ -24,9 +30,110 @@ SCHEMA_HINTS = {
     "publication-date": "TIMESTAMP"
 }
 
+# Known columns per (host, port, database, table), so repeated batch inserts
+# skip the CREATE TABLE and information_schema round trips
+_schema_cache = {}
 
-def store_dataframe_to_postgres(df: pd.DataFrame, table_name: str, db_config: dict):
+# Connection pools per db_config, so repeated stores (e.g. every sync batch)
+# reuse a live connection instead of reconnecting and re-authenticating.
+# Each pool is paired with a semaphore of POOL_MAX_CONN slots: getconn() raises
+# PoolError when the pool is exhausted, so extra stores wait for a slot instead
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+POOL_MAX_CONN = 8
+
+# Below this many rows the COPY setup costs more than execute_values saves
+COPY_MIN_ROWS = 1000
+COPY_NULL = "\\N"
+
+
+class _CsvRowStream:
+    """
+    Read-only file object rendering rows as CSV text on demand, so COPY can
+    stream a frame without building the whole CSV in memory.
+    None values are written as the unquoted COPY_NULL marker.
+    """
+
+    def __init__(self, rows, rows_per_refill: int = 500):
+        self._rows = iter(rows)
+        self._rows_per_refill = rows_per_refill
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self._pos = 0
+
+    def _refill(self):
+        chunk = list(islice(self._rows, self._rows_per_refill))
+        if not chunk:
+            return False
+        self._writer.writerows(
+            tuple(COPY_NULL if val is None else val for val in row) for row in chunk)
+        self._pending = self._pending[self._pos:] + self._buffer.getvalue()
+        self._pos = 0
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) - self._pos < size:
+            if not self._refill():
+                break
+        end = len(self._pending) if size < 0 else self._pos + size
+        data = self._pending[self._pos:end]
+        self._pos += len(data)
+        return data
+
+
+def _get_pool(db_config: dict):
+    """
+    Return (pool, slots) for db_config, creating them on first use. Hold one
+    of the slots while a connection from the pool is checked out.
+    """
+    key = tuple(sorted(db_config.items()))
+    with _POOLS_LOCK:
+        entry = _POOLS.get(key)
+        if entry is None:
+            pool = psycopg2.pool.ThreadedConnectionPool(
+                1, POOL_MAX_CONN, **db_config)
+            entry = _POOLS[key] = (pool, threading.BoundedSemaphore(POOL_MAX_CONN))
+        return entry
+
+
+def _checkout(pool):
+    """
+    Get a live connection from pool. Idle pooled connections may have been
+    dropped by the server or a NAT since their last use (syncs run a day
+    apart), so each is checked with SELECT 1 and replaced if it is dead.
+    """
+    # Every idle connection may be dead; after discarding as many as the pool
+    # can hold, getconn() opens a new one
+    for _ in range(POOL_MAX_CONN):
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning(f"Discarding dead pooled connection: {e}")
+            pool.putconn(conn, close=True)
+    return pool.getconn()
+
+
+@atexit.register
+def close_pools():
+    """Close every pooled connection."""
+    with _POOLS_LOCK:
+        for pool, _ in _POOLS.values():
+            pool.closeall()
+        _POOLS.clear()
+
+
+def store_dataframe_to_postgres(df: pd.DataFrame, table_name: str, db_config: dict,
+                                page_size: int = 1000):
+    pool = None
+    slots = None
     conn = None
+    cache_key = None
     try:
         # Drop rows with missing publication-number (important for PRIMARY KEY)
         if "publication-number" in df.columns:
@@ -37,55 +144,79 @@ def store_dataframe_to_postgres(df: pd.DataFrame, table_name: str, db_config: di
                 logger.warning(
                     f"Dropped {before - after} rows with missing 'publication-number'")
 
-        conn = psycopg2.connect(**db_config)
+        if df.empty:
+            # Nothing to insert; skip the connection and DDL round trips
+            logger.info(f"No rows to store in '{table_name}'.")
+            return
+
+        pool, pool_slots = _get_pool(db_config)
+        pool_slots.acquire()
+        slots = pool_slots  # only release in finally what was acquired
+        conn = _checkout(pool)
         cursor = conn.cursor()
 
-        # Step 1: Build full CREATE TABLE statement
-        column_defs = []
-        for col in df.columns:
-            pg_type = SCHEMA_HINTS.get(col, "TEXT")
-            column_defs.append(f'"{col}" {pg_type}')
-        schema_sql = ", ".join(column_defs)
-
-        logger.info(f"Ensuring table '{table_name}' exists with schema.")
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} ({schema_sql});
-        """)
-
-        # Step 2: Get existing column names
-        cursor.execute(f"""
-            SELECT column_name FROM information_schema.columns
-            WHERE table_name = %s
-        """, (table_name,))
-        existing_columns = set(row[0] for row in cursor.fetchall())
-
-        # Step 3: Add missing columns
-        for col in df.columns:
-            if col not in existing_columns:
+        cache_key = (db_config.get("host"), db_config.get("port"),
+                     db_config.get("dbname") or db_config.get("database"), table_name)
+        existing_columns = _schema_cache.get(cache_key)
+
+        if existing_columns is None:
+            # Step 1: Build full CREATE TABLE statement
+            column_defs = []
+            for col in df.columns:
+                pg_type = SCHEMA_HINTS.get(col, "TEXT")
+                column_defs.append(f'"{col}" {pg_type}')
+            schema_sql = ", ".join(column_defs)
+
+            logger.info(f"Ensuring table '{table_name}' exists with schema.")
+            # Step 2: Create the table and read back its columns in one round
+            # trip; psycopg2 returns the result of the last statement
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table_name} ({schema_sql.replace("%", "%%")});
+                SELECT column_name FROM information_schema.columns
+                WHERE table_name = %s;
+            """, (table_name,))
+            existing_columns = set(row[0] for row in cursor.fetchall())
+            _schema_cache[cache_key] = existing_columns
+
+        # Step 3: Add all missing columns with a single ALTER TABLE; IF NOT
+        # EXISTS keeps a stale cache (another writer added the column) harmless
+        missing = [col for col in df.columns if col not in existing_columns]
+        if missing:
+            additions = []
+            for col in missing:
                 col_type = SCHEMA_HINTS.get(col, "TEXT")
                 logger.warning(
                     f"Column '{col}' missing in DB — adding as {col_type}.")
-                cursor.execute(
-                    f'ALTER TABLE {table_name} ADD COLUMN "{col}" {col_type};')
+                additions.append(f'ADD COLUMN IF NOT EXISTS "{col}" {col_type}')
+            cursor.execute(f'ALTER TABLE {table_name} {", ".join(additions)};')
+            existing_columns.update(missing)
 
-        # Step 4: Insert data in batches
-        rows = [tuple(str(val) if pd.notna(val) else None for val in row)
-                for row in df.to_numpy()]
+        # Step 4: Insert data — COPY for bulk loads, batched INSERTs otherwise
+        # Stringify column-wise in pandas rather than cell by cell in Python
+        values = df.astype(str).to_numpy(dtype=object)
+        values[df.isna().to_numpy()] = None
+        rows = map(tuple, values)
         quoted_cols = ", ".join(f'"{col}"' for col in df.columns)
-        query = f'INSERT INTO {table_name} ({quoted_cols}) VALUES %s'
 
-        logger.info(f"Inserting {len(rows)} rows into '{table_name}'.")
-        batch_size = 50000
-        for i in range(0, len(rows), batch_size):
-            chunk = rows[i:i+batch_size]
+        if len(df) >= COPY_MIN_ROWS:
+            logger.info(f"Copying {len(df)} rows into '{table_name}'.")
+            copy_sql = (f"COPY {table_name} ({quoted_cols}) FROM STDIN "
+                        f"WITH (FORMAT CSV, NULL '{COPY_NULL}')")
             try:
-                execute_values(cursor, query, chunk)
-                logger.info(f"Inserted batch {i // batch_size + 1}")
-            except Exception as batch_error:
-                logger.error(
-                    f"Error in batch {i // batch_size + 1}: {batch_error}")
+                cursor.copy_expert(copy_sql, _CsvRowStream(rows), size=1 << 16)
+            except Exception as copy_error:
+                logger.error(f"Error during COPY: {copy_error}")
                 conn.rollback()
                 raise
+        else:
+            query = f'INSERT INTO {table_name} ({quoted_cols}) VALUES %s'
+            logger.info(f"Inserting {len(df)} rows into '{table_name}'.")
+            # Same row template for every page, so build it once up front
+            template = "(" + ",".join(["%s"] * len(df.columns)) + ")"
+            # execute_values pulls page_size rows at a time from the iterator,
+            # so the tuples are never materialized as one big list
+            execute_values(cursor, query, rows, template=template,
+                           page_size=page_size)
 
         conn.commit()
         cursor.close()
@@ -95,7 +226,12 @@ def store_dataframe_to_postgres(df: pd.DataFrame, table_name: str, db_config: di
         logger.error(f"Error storing DataFrame to PostgreSQL: {e}")
         if conn:
             conn.rollback()
+        # The rollback may have undone our DDL, so look the schema up again next time
+        _schema_cache.pop(cache_key, None)
         raise
     finally:
         if conn:
-            conn.close()
+            # A connection that died mid-store is discarded by the pool
+            pool.putconn(conn)
+        if slots is not None:
+            slots.release()
@@ -27,20 +27,34 @@ def load_last_sync_time(start_days_ago: int, last_sync_file: str = ".last_sync")
     return (datetime.now(timezone.utc) - timedelta(days=start_days_ago)).strftime("%Y%m%d")
 
 
-def save_last_sync_time(last_sync_file: str = ".last_sync"):
-    now = datetime.now(timezone.utc).strftime("%Y%m%d")
+def save_last_sync_time(last_sync_file: str = ".last_sync", sync_date: str = None):
+    sync_date = sync_date or datetime.now(timezone.utc).strftime("%Y%m%d")
+    # Skip the write if the file already holds this date
+    if os.path.exists(last_sync_file):
+        try:
+            with open(last_sync_file, "r", encoding="utf-8") as f:
+                if f.read().strip() == sync_date:
+                    return
+        except Exception:
+            pass
     with open(last_sync_file, "w", encoding="utf-8") as f:
-        f.write(now)
+        f.write(sync_date)
 
 
 def sync_once(start_days_ago=7, filters=None,
               output_file=None, output_format="none", last_sync_file=".last_sync",
-              db_url=None, db_table="notices", preprocess=True):
-    client = TEDAPIClient()
+              db_url=None, db_table="notices", preprocess=True, client=None):
+    # Reuse the caller's client (and its pooled session) across scheduled runs
+    owns_client = client is None
+    if owns_client:
+        client = TEDAPIClient()
     last_sync = load_last_sync_time(start_days_ago, last_sync_file)
     today = datetime.now(timezone.utc).strftime("%Y%m%d")
+    # Sorted oldest first, so every stored page moves the sync point forward
+    # and fetch_all_scroll reports it through progress_callback
     query = client.build_query(
-        start_date=last_sync, end_date=today, additional_filters=filters)
+        start_date=last_sync, end_date=today, additional_filters=filters
+    ) + " SORT BY dispatch-date ASC"
 
     print(f"[sync] Syncing notices from {last_sync} to {today}.")
 
@@ -56,6 +70,18 @@ def sync_once(start_days_ago=7, filters=None,
             "preprocess": preprocess
         }
 
+    # Advance the sync point as pages are committed, so a failure mid-scroll
+    # does not make the next run re-fetch everything already stored. The next
+    # run's range includes that date, so notices sharing it with later pages
+    # are not skipped
+    synced_up_to = last_sync
+
+    def record_progress(page_date):
+        nonlocal synced_up_to
+        if last_sync < page_date <= today and page_date > synced_up_to:
+            synced_up_to = page_date
+            save_last_sync_time(last_sync_file, synced_up_to)
+
     try:
         client.fetch_all_scroll(
             query=query,
@@ -64,7 +90,9 @@ def sync_once(start_days_ago=7, filters=None,
             store_db=store_to_db,
             db_options=db_options,
             progress_start_date=last_sync,
-            progress_end_date=today
+            progress_end_date=today,
+            progress_callback=record_progress,
+            return_results=False
         )
         save_last_sync_time(last_sync_file)
         print("[sync] Synchronization completed successfully.")
@@ -72,13 +100,21 @@ def sync_once(start_days_ago=7, filters=None,
         print(f"[sync] API error during sync: {e}")
     except Exception as e:
         print(f"[sync] Unexpected error during sync: {e}")
+    finally:
+        if owns_client:
+            client.close()
 
 
 def start_scheduler(interval_minutes=1440, **kwargs):
-    sync_once(**kwargs)
-    schedule.every(interval_minutes).minutes.do(sync_once, **kwargs)
+    client = TEDAPIClient()
+    sync_once(client=client, **kwargs)
+    schedule.every(interval_minutes).minutes.do(
+        sync_once, client=client, **kwargs)
 
     print(f"[sync] Scheduler started — every {interval_minutes} minutes")
     while True:
+        # Sleep until the next job is due instead of polling every second
+        idle = schedule.idle_seconds()
+        if idle is not None and idle > 0:
+            time.sleep(idle)
         schedule.run_pending()
-        time.sleep(1)
@@ -1,5 +1,4 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import logging
 
 logger = logging.getLogger("ARIMA")
@@ -28,41 +27,63 @@ def plot_forecast_results(df: pd.DataFrame, plot_path: str = None):
         return
 
     df = df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    # Skip parsing entirely if the column is already datetime (e.g. read_json);
+    # otherwise give an explicit format so pandas uses its vectorized parser
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(
+            df["date"], format="ISO8601", errors="coerce", cache=True)
     df = df.set_index("date").sort_index()
+    # None-padded columns arrive as object dtype, which matplotlib converts
+    # point by point; plot float64 with NaN gaps instead
+    for col in ("count", "train", "test", "predicted", "forecast"):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
 
-    plt.figure(figsize=(14, 8))
+    # matplotlib takes a few hundred ms to import, so only load it when plotting
+    if plot_path:
+        from matplotlib.figure import Figure
+        # Render off-screen on a standalone Figure: no pyplot bookkeeping or
+        # GUI backend, and nothing left open once the file is written
+        fig = Figure(figsize=(14, 8))
+    else:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(14, 8))
+    ax = fig.add_subplot()
 
     # Optional layers depending on available columns
     if "count" in df.columns:
-        plt.plot(df.index, df["count"], label="Original",
-                 linestyle=":", color="grey")
+        ax.plot(df.index, df["count"], label="Original",
+                linestyle=":", color="grey")
     if "train" in df.columns and df["train"].notna().any():
-        plt.plot(df.index, df["train"], label="Train", color="blue")
-        plt.axvline(x=df["train"].last_valid_index(), color="black",
-                    linestyle="--", alpha=0.5, label="Train/Test Split")
+        ax.plot(df.index, df["train"], label="Train", color="blue")
+        ax.axvline(x=df["train"].last_valid_index(), color="black",
+                   linestyle="--", alpha=0.5, label="Train/Test Split")
     if "test" in df.columns and df["test"].notna().any():
-        plt.plot(df.index, df["test"], label="Test", color="green")
-        plt.axvline(x=df["test"].last_valid_index(), color="black",
-                    linestyle="--", alpha=0.5, label="End of Test Data")
+        ax.plot(df.index, df["test"], label="Test", color="green")
+        ax.axvline(x=df["test"].last_valid_index(), color="black",
+                   linestyle="--", alpha=0.5, label="End of Test Data")
     if "predicted" in df.columns and df["predicted"].notna().any():
-        plt.plot(df.index, df["predicted"],
-                 label="In-Sample Prediction", color="orange", linestyle="--")
+        ax.plot(df.index, df["predicted"],
+                label="In-Sample Prediction", color="orange", linestyle="--")
     if "forecast" in df.columns and df["forecast"].notna().any():
-        plt.plot(df.index, df["forecast"],
-                 label="Out-of-Sample Forecast", color="red", linestyle="--")
+        ax.plot(df.index, df["forecast"],
+                label="Out-of-Sample Forecast", color="red", linestyle="--")
 
-    plt.title(
+    ax.set_title(
         "Procurement Notice Count – Historical, Prediction, and Out-of-Sample Forecast")
-    plt.xlabel("Date")
-    plt.ylabel("Notice Count")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Notice Count")
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
 
     if plot_path:
-        plt.savefig(plot_path)
+        save_kwargs = {}
+        if plot_path.lower().endswith(".png"):
+            # matplotlib hands PNG encoding to Pillow; zlib level 1 encodes
+            # about twice as fast as the default 6 for a slightly larger file
+            save_kwargs["pil_kwargs"] = {"compress_level": 1}
+        fig.savefig(plot_path, dpi=100, **save_kwargs)
         logger.info(f"Saved plot to {plot_path}")
-        plt.close("all")
     else:
         plt.show()
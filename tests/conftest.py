@@ -0,0 +1,125 @@
+import importlib
+import orjson
+import pytest
+from click.testing import CliRunner
+from analyzer import api
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    Pin the tests that share a live PostgreSQL database to one xdist group, so
+    `pytest -n auto --dist=loadgroup` runs them on a single worker while every
+    other test is spread across all workers.
+    Runs first because xdist reads the group marks in its own hook.
+    """
+    if not config.pluginmanager.hasplugin("xdist"):
+        return
+    for item in items:
+        if item.get_closest_marker("database"):
+            item.add_marker(pytest.mark.xdist_group(name="database"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_imports():
+    """Import the heavy analyzer modules (pandas, statsmodels) before any test runs."""
+    import analyzer.arima  # noqa: F401
+    import analyzer.preprocessing  # noqa: F401
+    import analyzer.sync  # noqa: F401
+
+
+class FastMonkey:
+    """
+    Lightweight stand-in for monkeypatch.setattr on dotted import paths.
+    Patches are appended as they are made and undone in reverse on exit.
+    """
+
+    _NOTSET = object()
+
+    def __init__(self):
+        self._undo = []
+
+    @staticmethod
+    def _resolve(target):
+        module_path, attr = target.rsplit(".", 1)
+        parts = module_path.split(".")
+        obj = importlib.import_module(parts[0])
+        for i, part in enumerate(parts[1:], start=2):
+            try:
+                obj = getattr(obj, part)
+            except AttributeError:
+                obj = importlib.import_module(".".join(parts[:i]))
+        return obj, attr
+
+    def setattr(self, target, value):
+        obj, attr = self._resolve(target)
+        self._undo.append((obj, attr, getattr(obj, attr, self._NOTSET)))
+        setattr(obj, attr, value)
+
+    def undo(self):
+        for obj, attr, old in reversed(self._undo):
+            if old is self._NOTSET:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, old)
+        self._undo.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.undo()
+
+
+@pytest.fixture
+def fast_monkey():
+    """FastMonkey whose patches are reverted after the test."""
+    with FastMonkey() as patcher:
+        yield patcher
+
+
+@pytest.fixture(scope="session")
+def cli_runner():
+    """Single CliRunner shared by all CLI tests."""
+    return CliRunner()
+
+
+@pytest.fixture(scope="session")
+def ted_client():
+    """Default TEDAPIClient shared by tests that do not reconfigure it."""
+    with api.TEDAPIClient() as client:
+        yield client
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response used by the API client."""
+
+    def __init__(self, json=None, status_code=200, text=""):
+        self._json = json
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = text
+        self.content = orjson.dumps(json) if json is not None else text.encode()
+        self.headers = {
+            "Content-Type": "application/json" if json is not None else "text/plain"}
+
+    def json(self):
+        if self._json is None:
+            raise ValueError("Response body is not JSON")
+        return self._json
+
+
+@pytest.fixture
+def fake_post_factory():
+    """
+    Build a fake post() returning a canned FakeResponse.
+    The raw request body of the latest call is kept in fake_post.last_body;
+    tests that inspect the payload decode it themselves.
+    """
+    def factory(json=None, status_code=200, text=""):
+        def fake_post(url, **kwargs):
+            fake_post.last_body = kwargs["data"]
+            return FakeResponse(json=json, status_code=status_code, text=text)
+        fake_post.last_body = None
+        return fake_post
+    return factory
@@ -11,6 +11,7 @@ load_dotenv()
 
 
 @pytest.mark.storage
+@pytest.mark.database
 def test_store_dataframe_roundtrip():
     """Insert a DataFrame and validate it was stored correctly in PostgreSQL."""
     db_config = {
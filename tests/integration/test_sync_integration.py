@@ -9,6 +9,7 @@ load_dotenv()
 
 
 @pytest.mark.sync
+@pytest.mark.database
 def test_sync_to_postgres(tmp_path):
     """Ensure sync_once can store data to PostgreSQL with preprocessing, and clean up test table."""
     db_config = {
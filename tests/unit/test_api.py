@@ -1,27 +1,56 @@
+import csv
 import json
-import time
+import logging
+import orjson
 import pytest
-import pandas as pd
+import pyarrow.parquet as pq
 import requests
+import threading
+import time
 from unittest.mock import patch
 from analyzer import api
 
+
+class _ListHandler(logging.Handler):
+    """Logging handler that keeps records in memory."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+SEARCH_URL = "https://api.ted.europa.eu/v3/notices/search"
+
+# Canned responses shared across tests; treat them as read-only
+_SEARCH_2_RESULTS = {"totalCount": 2, "results": [
+    {"id": "1-2025"}, {"id": "2-2025"}]}
+_SEARCH_1_RESULT = {"totalCount": 1, "results": [
+    {"id": "XYZ-2025", "title": "Test Notice"}]}
+_SEARCH_EMPTY = {"totalCount": 0, "results": []}
+
+_SCROLL_PUB1 = {"json": {"notices": [{"publication-number": "PUB1"}],
+                         "iterationNextToken": "TOKEN123"}, "status_code": 200}
+_SCROLL_PUB2 = {"json": {"notices": [{"publication-number": "PUB2"}],
+                         "iterationNextToken": "TOKEN456"}, "status_code": 200}
+_SCROLL_END = {"json": {"notices": [], "iterationNextToken": "TOKEN_END"},
+               "status_code": 200}
+
 # region Basic Search Tests
 
 
 @pytest.mark.api
-def test_search_success(requests_mock):
+def test_search_success(ted_client, monkeypatch, fake_post_factory):
     """Test that a successful API call returns expected data."""
-    sample_response = {"totalCount": 2, "results": [
-        {"id": "1-2025"}, {"id": "2-2025"}]}
-    url = "https://api.ted.europa.eu/v3/notices/search"
-    requests_mock.post(url, json=sample_response, status_code=200)
+    fake_post = fake_post_factory(json=_SEARCH_2_RESULTS)
+    monkeypatch.setattr(ted_client.session, "post", fake_post)
 
-    client = api.TEDAPIClient()
-    result = client.search_notices(query="CPV=12345678", page=1, limit=2)
+    result = ted_client.search_notices(query="CPV=12345678", page=1, limit=2)
 
-    assert result == sample_response
-    sent_payload = requests_mock.last_request.json()
+    assert result == _SEARCH_2_RESULTS
+    sent_payload = orjson.loads(fake_post.last_body)
     assert sent_payload["query"] == "CPV=12345678"
     assert sent_payload["page"] == 1
     assert sent_payload["limit"] == 2
@@ -32,112 +61,224 @@ def test_search_success(requests_mock):
 
 
 @pytest.mark.api
-def test_search_with_fields(requests_mock):
+def test_search_with_fields(ted_client, monkeypatch, fake_post_factory):
     """Test that specifying fields includes them in the request payload."""
-    sample_response = {"totalCount": 1, "results": [
-        {"id": "XYZ-2025", "title": "Test Notice"}]}
-    url = "https://api.ted.europa.eu/v3/notices/search"
-    requests_mock.post(url, json=sample_response, status_code=200)
+    fake_post = fake_post_factory(json=_SEARCH_1_RESULT)
+    monkeypatch.setattr(ted_client.session, "post", fake_post)
 
-    client = api.TEDAPIClient()
     fields = ["ID", "TITLE"]
-    result = client.search_notices(query="abc", fields=fields, page=1, limit=1)
+    result = ted_client.search_notices(query="abc", fields=fields, page=1, limit=1)
 
-    assert result == sample_response
-    sent_payload = requests_mock.last_request.json()
+    assert result == _SEARCH_1_RESULT
+    sent_payload = orjson.loads(fake_post.last_body)
     assert sent_payload["fields"] == fields
 
 
 @pytest.mark.api
-def test_search_iteration_mode(requests_mock):
+def test_search_iteration_mode(ted_client, monkeypatch, fake_post_factory):
     """Test using ITERATION pagination mode includes the token."""
-    sample_response = {"totalCount": 0, "results": []}
-    url = "https://api.ted.europa.eu/v3/notices/search"
-    requests_mock.post(url, json=sample_response, status_code=200)
+    fake_post = fake_post_factory(json=_SEARCH_EMPTY)
+    monkeypatch.setattr(ted_client.session, "post", fake_post)
 
-    client = api.TEDAPIClient()
     token = "TEST_TOKEN_123"
-    result = client.search_notices(
+    result = ted_client.search_notices(
         query="abc", page=1, limit=10, pagination_mode="ITERATION", iteration_token=token)
 
-    assert result == sample_response
-    sent_payload = requests_mock.last_request.json()
+    assert result == _SEARCH_EMPTY
+    sent_payload = orjson.loads(fake_post.last_body)
     assert sent_payload["paginationMode"] == "ITERATION"
     assert sent_payload["iterationNextToken"] == token
+
+
+@pytest.mark.api
+def test_client_context_manager_closes_session(monkeypatch):
+    """Test that leaving the with-block closes the pooled session."""
+    closed = []
+    with api.TEDAPIClient() as client:
+        monkeypatch.setattr(client.session, "close", lambda: closed.append(True))
+    assert closed == [True]
 # endregion
 
 # region Scroll Mode Tests
 
 
+def _parse_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return {r["publication-number"] for r in csv.DictReader(f)}
+
+
+def _parse_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return {n["publication-number"] for n in json.load(f)}
+
+
+def _parse_parquet(path):
+    return set(pq.read_table(path).column("publication-number").to_pylist())
+
+
+def _csv_records(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
 @pytest.mark.api
-def test_fetch_all_scroll_multiple_pages_csv(tmp_path, requests_mock):
-    """Test fetch_all_scroll saving to CSV incrementally."""
-    url = "https://api.ted.europa.eu/v3/notices/search"
-    output_file = tmp_path / "notices.csv"
+@pytest.mark.parametrize("fmt, parser", [
+    ("csv", _parse_csv), ("json", _parse_json), ("parquet", _parse_parquet)])
+def test_fetch_all_scroll_multiple_pages(tmp_path, requests_mock, fmt, parser):
+    """Test fetch_all_scroll writing every page to the chosen output format."""
+    output_file = tmp_path / f"notices.{fmt}"
 
-    requests_mock.post(url, [
-        {"json": {"notices": [{"publication-number": "PUB1"}],
-                  "iterationNextToken": "TOKEN123"}, "status_code": 200},
-        {"json": {"notices": [{"publication-number": "PUB2"}],
-                  "iterationNextToken": "TOKEN456"}, "status_code": 200},
-        {"json": {"notices": [], "iterationNextToken": "TOKEN_END"}, "status_code": 200},
-    ])
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB1, _SCROLL_PUB2, _SCROLL_END])
 
     client = api.TEDAPIClient()
 
     with patch("time.sleep", return_value=None):
         results = client.fetch_all_scroll(
-            query="test", limit=1, output_file=str(output_file), output_format="csv")
+            query="test", limit=1, checkpoint_file=str(tmp_path / ".token"),
+            output_file=str(output_file), output_format=fmt)
 
-    assert len(results) == 2
-    assert output_file.exists()
+    assert {r["publication-number"] for r in results} == {"PUB1", "PUB2"}
+    assert parser(output_file) == {"PUB1", "PUB2"}
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_can_return_count_only(tmp_path, requests_mock):
+    """Test that return_results=False returns the number of new notices."""
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB1, _SCROLL_PUB2, _SCROLL_END])
+
+    client = api.TEDAPIClient()
+    with patch("time.sleep", return_value=None):
+        count = client.fetch_all_scroll(
+            query="test", limit=1, checkpoint_file=str(tmp_path / ".token"),
+            output_file=str(tmp_path / "notices.csv"), output_format="csv",
+            return_results=False)
 
-    df = pd.read_csv(output_file)
-    assert set(df["publication-number"]) == {"PUB1", "PUB2"}
+    assert count == 2
+    assert _parse_csv(tmp_path / "notices.csv") == {"PUB1", "PUB2"}
 
 
 @pytest.mark.api
-def test_fetch_all_scroll_multiple_pages_json(tmp_path, requests_mock):
-    """Test fetch_all_scroll saving final result to JSON."""
-    url = "https://api.ted.europa.eu/v3/notices/search"
-    output_file = tmp_path / "notices.json"
+def test_fetch_all_scroll_prefetches_next_page_while_storing(tmp_path, requests_mock):
+    """Test that the next page is requested while the current one is being stored."""
+    second_requested = threading.Event()
+
+    def second_page(request, context):
+        second_requested.set()
+        return _SCROLL_PUB2["json"]
+    requests_mock.post(SEARCH_URL, [
+        _SCROLL_PUB1, {"json": second_page, "status_code": 200}, _SCROLL_END])
+    overlapped = []
+
+    def fake_store(df, table_name, db_config):
+        overlapped.append(second_requested.wait(timeout=5))
+
+    client = api.TEDAPIClient()
+    with patch("analyzer.storage.store_dataframe_to_postgres", fake_store):
+        count = client.fetch_all_scroll(
+            query="test", limit=1, checkpoint_file=str(tmp_path / "checkpoint.txt"),
+            store_db=True, db_options={"table": "t", "config": {}, "preprocess": False},
+            return_results=False)
+
+    assert count == 2
+    assert overlapped == [True, True]
 
-    requests_mock.post(url, [
-        {"json": {"notices": [{"publication-number": "PUB1"}],
+
+@pytest.mark.api
+@pytest.mark.parametrize("query, expected_calls", [
+    ("test SORT BY dispatch-date ASC", 1),
+    ("test", 0),
+])
+def test_fetch_all_scroll_reports_progress_only_for_sorted_queries(
+        tmp_path, requests_mock, query, expected_calls):
+    """Test progress is reported for date-sorted scrolls, after the page is on disk."""
+    output_file = tmp_path / "notices.csv"
+    requests_mock.post(SEARCH_URL, [
+        {"json": {"notices": [{"publication-number": "PUB1",
+                               "dispatch-date": "2025-03-04+01:00"}],
                   "iterationNextToken": "TOKEN123"}, "status_code": 200},
-        {"json": {"notices": [{"publication-number": "PUB2"}],
-                  "iterationNextToken": "TOKEN456"}, "status_code": 200},
-        {"json": {"notices": [], "iterationNextToken": "TOKEN_END"}, "status_code": 200},
+        _SCROLL_END,
     ])
+    reported = []
 
-    client = api.TEDAPIClient()
+    def on_progress(page_date):
+        reported.append((page_date, _parse_csv(output_file)))
 
-    with patch("time.sleep", return_value=None):
-        results = client.fetch_all_scroll(
-            query="test", limit=1, output_file=str(output_file), output_format="json")
+    api.TEDAPIClient().fetch_all_scroll(
+        query=query, limit=1, checkpoint_file=str(tmp_path / "checkpoint.txt"),
+        output_file=str(output_file), output_format="csv",
+        progress_callback=on_progress)
 
-    assert len(results) == 2
-    assert output_file.exists()
+    assert reported == [("20250304", {"PUB1"})] * expected_calls
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_failure_does_not_wait_for_prefetch(tmp_path, requests_mock):
+    """Test that an error while saving a page is raised without waiting for the next request."""
+    in_flight = threading.Event()
+    release = threading.Event()
+
+    def slow_page(request, context):
+        in_flight.set()
+        release.wait(timeout=5)
+        return _SCROLL_END["json"]
+    requests_mock.post(SEARCH_URL, [
+        {"json": {"notices": [{"publication-number": "PUB1",
+                               "dispatch-date": "2025-03-04"}],
+                  "iterationNextToken": "TOKEN123"}, "status_code": 200},
+        {"json": slow_page, "status_code": 200},
+    ])
 
-    with open(output_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    assert set(n["publication-number"] for n in data) == {"PUB1", "PUB2"}
+    def failing_callback(page_date):
+        in_flight.wait(timeout=5)
+        raise RuntimeError("callback failed")
+
+    started = time.monotonic()
+    try:
+        with pytest.raises(RuntimeError, match="callback failed"):
+            api.TEDAPIClient().fetch_all_scroll(
+                query="test SORT BY dispatch-date ASC", limit=1,
+                checkpoint_file=str(tmp_path / "checkpoint.txt"),
+                progress_callback=failing_callback)
+        # The pending request would hold the scroll for the full 5 seconds
+        assert time.monotonic() - started < 2
+    finally:
+        release.set()
+
+
+@pytest.mark.api
+def test_fetch_many_scroll_writes_one_file_per_query(tmp_path, requests_mock):
+    """Test that concurrent scrolls keep separate outputs and checkpoints."""
+    def respond(request, context):
+        body = request.json()
+        if body.get("iterationNextToken"):
+            return {"notices": [], "iterationNextToken": "END"}
+        return {"notices": [{"publication-number": f"PUB-{body['query']}"}],
+                "iterationNextToken": f"NEXT-{body['query']}"}
+    requests_mock.post(SEARCH_URL, json=respond)
+
+    client = api.TEDAPIClient()
+    with patch("time.sleep", return_value=None):
+        results = client.fetch_many_scroll(
+            ["A", "B"], max_workers=2, limit=1,
+            checkpoint_file=str(tmp_path / ".token"),
+            output_file=str(tmp_path / "notices.csv"), output_format="csv")
+
+    assert {q: [n["publication-number"] for n in r] for q, r in results.items()} == {
+        "A": ["PUB-A"], "B": ["PUB-B"]}
+    assert _parse_csv(tmp_path / "notices.0.csv") == {"PUB-A"}
+    assert _parse_csv(tmp_path / "notices.1.csv") == {"PUB-B"}
+    assert not list(tmp_path.glob(".token*"))
 
 
 @pytest.mark.api
 def test_fetch_all_scroll_checkpoint_resume_csv(tmp_path, requests_mock):
     """Test checkpoint resumption appending correctly."""
-    url = "https://api.ted.europa.eu/v3/notices/search"
     checkpoint_file = tmp_path / "checkpoint.txt"
     output_file = tmp_path / "notices.csv"
 
     checkpoint_file.write_text("TOKEN123")
 
-    requests_mock.post(url, [
-        {"json": {"notices": [{"publication-number": "PUB2"}],
-                  "iterationNextToken": "TOKEN456"}, "status_code": 200},
-        {"json": {"notices": [], "iterationNextToken": "TOKEN_END"}, "status_code": 200},
-    ])
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB2, _SCROLL_END])
 
     client = api.TEDAPIClient()
 
@@ -149,72 +290,424 @@ def test_fetch_all_scroll_checkpoint_resume_csv(tmp_path, requests_mock):
 
     assert len(results) == 1
     assert output_file.exists()
-
-    df = pd.read_csv(output_file)
-    assert df.iloc[0]["publication-number"] == "PUB2"
+    assert results[0]["publication-number"] == "PUB2"
     assert not checkpoint_file.exists()
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_resume_appends_to_json_array(tmp_path, requests_mock):
+    """Test that a resumed scroll extends the JSON array from the earlier run."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    output_file = tmp_path / "notices.json"
+    checkpoint_file.write_text("TOKEN123")
+    output_file.write_text('[\n{"publication-number": "PUB1"}\n]\n')
+
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB2, _SCROLL_END])
+
+    client = api.TEDAPIClient()
+    with patch("time.sleep", return_value=None):
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file),
+                                output_format="json")
+
+    assert _parse_json(output_file) == {"PUB1", "PUB2"}
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_resume_rewrites_parquet_with_earlier_rows(tmp_path, requests_mock):
+    """Test that a resumed scroll keeps the Parquet rows from the earlier run."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    output_file = tmp_path / "notices.parquet"
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB1, _SCROLL_PUB2, _SCROLL_END])
+
+    client = api.TEDAPIClient()
+    with patch("time.sleep", return_value=None):
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file),
+                                output_format="parquet")
+        checkpoint_file.write_text("TOKEN456")
+        requests_mock.post(SEARCH_URL, [
+            {"json": {"notices": [{"publication-number": "PUB3"}],
+                      "iterationNextToken": "TOKEN789"}, "status_code": 200},
+            _SCROLL_END,
+        ])
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file),
+                                output_format="parquet")
+
+    assert _parse_parquet(output_file) == {"PUB1", "PUB2", "PUB3"}
+    assert not (tmp_path / "notices.parquet.part").exists()
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_checkpoints_on_interruption(tmp_path, requests_mock):
+    """Test that an aborted scroll saves the last token before the interval is reached."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    requests_mock.post(SEARCH_URL, [
+        _SCROLL_PUB1, _SCROLL_PUB2, {"status_code": 503, "text": "Unavailable"}])
+
+    client = api.TEDAPIClient(max_retries=0)
+    with patch("time.sleep", return_value=None), pytest.raises(api.TEDAPIError):
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                checkpoint_interval=10,
+                                output_file=str(tmp_path / "notices.csv"),
+                                output_format="csv")
+
+    token, output_size = checkpoint_file.read_text().split("\n")
+    assert token == "TOKEN456"
+    assert int(output_size) == (tmp_path / "notices.csv").stat().st_size
+    assert _parse_csv(tmp_path / "notices.csv") == {"PUB1", "PUB2"}
+
+
+@pytest.mark.api
+@pytest.mark.parametrize("fmt, saved, torn", [
+    ("csv", b"publication-number\nPUB1\n", b'PUB9,"half'),
+    ("json", b'[\n{"publication-number":"PUB1"}', b',\n{"publication-num'),
+])
+def test_fetch_all_scroll_resume_drops_torn_record(tmp_path, requests_mock, fmt, saved, torn):
+    """Test that a resumed scroll cuts the output back to the checkpointed size."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    output_file = tmp_path / f"notices.{fmt}"
+    # A hard crash left a half-flushed record after the checkpointed bytes
+    output_file.write_bytes(saved + torn)
+    checkpoint_file.write_text(f"TOKEN123\n{len(saved)}")
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB2, _SCROLL_END])
+
+    client = api.TEDAPIClient()
+    with patch("time.sleep", return_value=None):
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file),
+                                output_format=fmt)
+
+    parser = _parse_csv if fmt == "csv" else _parse_json
+    assert parser(output_file) == {"PUB1", "PUB2"}
+
+
+def _dated_page(pub, date, token):
+    return {"json": {"notices": [{"publication-number": pub, "publication-date": date}],
+                     "iterationNextToken": token}, "status_code": 200}
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_parquet_checkpoints_only_closed_output(tmp_path, requests_mock):
+    """Test that no checkpoint covers pages still in the unfinished Parquet file."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    output_file = tmp_path / "notices.parquet"
+    checkpoint_seen = []
+
+    def page(pub_id, token):
+        def respond(request, context):
+            checkpoint_seen.append(checkpoint_file.exists())
+            return {"notices": [{"publication-number": pub_id}],
+                    "iterationNextToken": token}
+        return {"json": respond, "status_code": 200}
+    requests_mock.post(SEARCH_URL, [
+        page("PUB1", "TOKEN1"), page("PUB2", "TOKEN2"), page("PUB3", "TOKEN3"),
+        {"text": "Service Unavailable", "status_code": 503},
+    ])
+
+    client = api.TEDAPIClient(max_retries=0)
+    with pytest.raises(api.TEDAPIError):
+        client.fetch_all_scroll(query="test", limit=1, checkpoint_interval=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file),
+                                output_format="parquet")
+
+    assert checkpoint_seen == [False, False, False]
+    # Interrupted: the file was closed first, then the checkpoint written
+    assert checkpoint_file.read_text() == "TOKEN3"
+    assert _parse_parquet(output_file) == {"PUB1", "PUB2", "PUB3"}
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_partitioned_parquet_keeps_earlier_notices(tmp_path, requests_mock):
+    """Test that a partitioned scroll appends to a month without losing earlier notices."""
+    output_dir = tmp_path / "notices"
+    client = api.TEDAPIClient()
+
+    def scroll(pages):
+        requests_mock.post(SEARCH_URL, pages + [_SCROLL_END])
+        with patch("time.sleep", return_value=None):
+            client.fetch_all_scroll(query="test", limit=1,
+                                    checkpoint_file=str(tmp_path / ".token"),
+                                    output_file=str(output_dir), output_format="parquet",
+                                    partition_by="publication-date")
+
+    scroll([_dated_page("JAN1", "2024-01-01+01:00", "T1"),
+            _dated_page("JAN20", "2024-01-20+01:00", "T2")])
+    # A later range holding only the 25th, plus a notice saved already
+    scroll([_dated_page("JAN25", "2024-01-25+01:00", "T3"),
+            _dated_page("JAN20", "2024-01-20+01:00", "T4")])
+
+    saved = pq.read_table(output_dir / "year=2024" / "month=01") \
+        .column("publication-number").to_pylist()
+    assert sorted(saved) == ["JAN1", "JAN20", "JAN25"]
+
+
+@pytest.mark.api
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_fetch_all_scroll_resume_skips_already_saved_notices(tmp_path, requests_mock, fmt):
+    """Test that pages re-served after a resume are not written twice."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    output_file = tmp_path / f"notices.{fmt}"
+    client = api.TEDAPIClient()
+
+    requests_mock.post(SEARCH_URL, [_SCROLL_PUB1, _SCROLL_PUB2, _SCROLL_END])
+    with patch("time.sleep", return_value=None):
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file), output_format=fmt)
+
+        # The checkpoint lags behind the output: PUB2 is served again
+        checkpoint_file.write_text("TOKEN123")
+        requests_mock.post(SEARCH_URL, [_SCROLL_PUB2, _SCROLL_END])
+        results = client.fetch_all_scroll(query="test", limit=1,
+                                          checkpoint_file=str(checkpoint_file),
+                                          output_file=str(output_file),
+                                          output_format=fmt)
+
+    assert results == []
+    parser = _parse_csv if fmt == "csv" else _parse_parquet
+    assert parser(output_file) == {"PUB1", "PUB2"}
+    if fmt == "csv":
+        assert len(_csv_records(output_file)) == 2
+
+
+@pytest.mark.api
+@pytest.mark.parametrize("fmt, reader", [
+    ("csv", _csv_records),
+    ("parquet", lambda path: pq.read_table(path).to_pylist()),
+])
+def test_fetch_all_scroll_keeps_fields_missing_from_first_page(tmp_path, requests_mock, fmt, reader):
+    """Test that a requested field first returned on a later page still gets a column."""
+    output_file = tmp_path / f"notices.{fmt}"
+    requests_mock.post(SEARCH_URL, [
+        {"json": {"notices": [{"publication-number": "PUB1", "notice-type": "cn"}],
+                  "iterationNextToken": "TOKEN123"}, "status_code": 200},
+        {"json": {"notices": [{"publication-number": "PUB2", "tender-value": "100"}],
+                  "iterationNextToken": "TOKEN456"}, "status_code": 200},
+        _SCROLL_END,
+    ])
+
+    api.TEDAPIClient().fetch_all_scroll(
+        query="test", fields=["notice-type", "tender-value"], limit=1,
+        checkpoint_file=str(tmp_path / "checkpoint.txt"),
+        output_file=str(output_file), output_format=fmt)
+
+    rows = reader(output_file)
+    assert [(r["publication-number"], r["notice-type"] or None, r["tender-value"] or None)
+            for r in rows] == [("PUB1", "cn", None), ("PUB2", None, "100")]
+
+
+@pytest.mark.api
+def test_fetch_all_scroll_resume_keeps_existing_csv_columns(tmp_path, requests_mock):
+    """Test that resumed pages are appended under the existing CSV header."""
+    checkpoint_file = tmp_path / "checkpoint.txt"
+    output_file = tmp_path / "notices.csv"
+    checkpoint_file.write_text("TOKEN123")
+    output_file.write_text("title,publication-number\r\nFirst,PUB1\r\n")
+
+    requests_mock.post(SEARCH_URL, [
+        {"json": {"notices": [{"publication-number": "PUB2", "title": "Second",
+                               "links": {"xml": "..."}}],
+                  "iterationNextToken": "TOKEN456"}, "status_code": 200},
+        _SCROLL_END,
+    ])
+
+    client = api.TEDAPIClient()
+    with patch("time.sleep", return_value=None):
+        client.fetch_all_scroll(query="test", limit=1,
+                                checkpoint_file=str(checkpoint_file),
+                                output_file=str(output_file),
+                                output_format="csv")
+
+    with open(output_file, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows == [["title", "publication-number"],
+                    ["First", "PUB1"], ["Second", "PUB2"]]
+
+
+@pytest.mark.api
+def test_save_notices_as_csv_appends_without_header(ted_client, tmp_path):
+    """Test that saved CSVs drop 'links', keep missing values empty, and append rows."""
+    output_file = tmp_path / "notices.csv"
+    ted_client.save_notices_as_csv(
+        [{"publication-number": "PUB1", "title": 'say "hi", twice',
+          "links": {"xml": "..."}}, {"publication-number": "PUB2"}],
+        str(output_file))
+    ted_client.save_notices_as_csv(
+        [{"publication-number": "PUB3", "title": "Third"}],
+        str(output_file), append=True)
+
+    with open(output_file, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows == [["publication-number", "title"],
+                    ["PUB1", 'say "hi", twice'], ["PUB2", ""], ["PUB3", "Third"]]
+
+
+@pytest.mark.api
+def test_save_notices_as_csv_matches_scroll_output(tmp_path, requests_mock):
+    """Test that both fetch modes write byte-identical CSVs with minimal quoting."""
+    notices = [{"publication-number": "PUB1", "title": 'say "hi", twice',
+                "links": {"xml": "..."}},
+               {"publication-number": "PUB2", "title": "plain"}]
+    saved = tmp_path / "saved.csv"
+    scrolled = tmp_path / "scrolled.csv"
+    client = api.TEDAPIClient()
+
+    client.save_notices_as_csv(notices, str(saved))
+    requests_mock.post(SEARCH_URL, [
+        {"json": {"notices": notices, "iterationNextToken": "TOKEN1"}, "status_code": 200},
+        _SCROLL_END])
+    client.fetch_all_scroll(query="test", fields=["title"],
+                            checkpoint_file=str(tmp_path / ".token"),
+                            output_file=str(scrolled), output_format="csv")
+
+    assert saved.read_bytes() == scrolled.read_bytes() == (
+        b'publication-number,title\nPUB1,"say ""hi"", twice"\nPUB2,plain\n')
+
+
+@pytest.mark.api
+def test_save_notices_as_json_round_trips(ted_client, tmp_path):
+    """Test that saved JSON keeps nested values and non-ASCII text as is."""
+    notices = [{"publication-number": "PUB1", "title": "Délégation",
+                "links": {"xml": ["a", "b"]}}]
+    output_file = tmp_path / "notices.json"
+    ted_client.save_notices_as_json(notices, str(output_file))
+
+    text = output_file.read_text(encoding="utf-8")
+    assert "Délégation" in text
+    assert json.loads(text) == notices
 # endregion
 
 # region Error Handling Tests
 
 
 @pytest.mark.retry
-def test_search_http_error_json(requests_mock):
+def test_search_http_error_json(monkeypatch, requests_mock):
     """Test that an HTTP error with a JSON body raises TEDAPIError."""
-    url = "https://api.ted.europa.eu/v3/notices/search"
     requests_mock.post(
-        url, json={"error": "Invalid query syntax"}, status_code=400)
+        SEARCH_URL, json={"error": "Invalid query syntax"}, status_code=400)
 
     client = api.TEDAPIClient()
+    _skip_backoff(monkeypatch, client)
     with pytest.raises(api.TEDAPIError) as excinfo:
         client.search_notices(query="INVALID QUERY")
     assert "400" in str(excinfo.value)
 
 
 @pytest.mark.retry
-def test_search_http_error_text(requests_mock):
+def test_search_http_error_text(monkeypatch, requests_mock):
     """Test that an HTTP error with a plain text body raises TEDAPIError."""
-    url = "https://api.ted.europa.eu/v3/notices/search"
-    requests_mock.post(url, text="Service Unavailable", status_code=503)
+    requests_mock.post(SEARCH_URL, text="Service Unavailable", status_code=503)
 
     client = api.TEDAPIClient()
+    _skip_backoff(monkeypatch, client)
     with pytest.raises(api.TEDAPIError) as excinfo:
         client.search_notices(query="ANY")
     assert "503" in str(excinfo.value)
+# endregion
 
+# region Retry and Rate Limit Tests
 
-@pytest.mark.retry
-def test_search_network_error(monkeypatch):
-    """Test that a network error raises TEDAPIError."""
-    client = api.TEDAPIClient()
 
+def _failing_post(exc, calls):
+    """Build a fake post() that records each call and raises exc."""
     def fake_post(*args, **kwargs):
-        raise requests.exceptions.ConnectTimeout("Connection timed out")
-    monkeypatch.setattr(requests, "post", fake_post)
+        calls.append(kwargs)
+        raise exc
+    return fake_post
+
+
+@pytest.mark.retry
+@pytest.mark.parametrize("exc, retries, expected_n, needle", [
+    (requests.exceptions.ConnectTimeout("Connection timed out"), 2, 3, "Max retries exceeded"),
+    (requests.exceptions.RequestException("fail"), 2, 3, "Max retries exceeded"),
+    (requests.exceptions.ConnectTimeout("Connection timed out"), 0, 1, "Max retries exceeded"),
+])
+def test_search_network_error_retries(monkeypatch, exc, retries, expected_n, needle):
+    """Test that network errors are retried max_retries times, then raise TEDAPIError."""
+    client = api.TEDAPIClient(max_retries=retries)
+    calls = []
+    monkeypatch.setattr(client.session, "post", _failing_post(exc, calls))
+    monkeypatch.setattr("analyzer.api.time.sleep", lambda s: None)
 
     with pytest.raises(api.TEDAPIError) as excinfo:
-        client.search_notices(query="ANY")
-    assert "Max retries exceeded" in str(excinfo.value)
-# endregion
+        client.search_notices(query="any")
 
-# region Retry and Rate Limit Tests
+    assert len(calls) == expected_n
+    assert needle in str(excinfo.value)
 
 
-@pytest.mark.retry
-def test_fetch_notices_exponential_retry(monkeypatch):
-    """Test exponential backoff retry."""
-    client = api.TEDAPIClient(max_retries=2, backoff_factor=0.5)
-    calls = []
+def _skip_backoff(monkeypatch, client):
+    """Run retries on virtual time with a fixed jitter, so they cost no wall time."""
+    monkeypatch.setattr("analyzer.api.random.uniform", lambda a, b: 1.0)
+    return _virtual_time(monkeypatch, client)
 
-    def fake_post(*args, **kwargs):
-        calls.append(time.time())
-        raise requests.exceptions.ConnectTimeout("timeout!")
-    monkeypatch.setattr(requests, "post", fake_post)
+
+def _virtual_time(monkeypatch, client):
+    """Drive the client's clock and time.sleep from a fake timeline; return the sleeps."""
+    sleeps = []
+    now = [0.0]
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    monkeypatch.setattr(client, "_clock", lambda: now[0])
+    monkeypatch.setattr("analyzer.api.time.sleep", fake_sleep)
+    return sleeps
+
+
+@pytest.mark.retry
+def test_fetch_notices_exponential_backoff(monkeypatch):
+    """Test that the jittered delay between retries doubles."""
+    client = api.TEDAPIClient(max_retries=3, backoff_factor=0.5)
+    sleeps = _virtual_time(monkeypatch, client)
+    monkeypatch.setattr(client.session, "post", _failing_post(
+        requests.exceptions.ConnectTimeout("timeout!"), []))
 
     with pytest.raises(api.TEDAPIError):
         client.search_notices(query="any")
 
-    assert len(calls) == 3
+    assert len(sleeps) == 3
+    for attempt, slept in enumerate(sleeps):
+        base = 0.5 * 2 ** attempt
+        assert 0.5 * base <= slept <= 1.5 * base
+
+
+@pytest.mark.retry
+def test_retry_honours_retry_after(monkeypatch, requests_mock):
+    """Test that a 429 waits for the server's Retry-After instead of the backoff."""
+    client = api.TEDAPIClient(max_retries=1)
+    sleeps = _virtual_time(monkeypatch, client)
+    requests_mock.post(SEARCH_URL, [
+        {"status_code": 429, "text": "Too Many Requests",
+         "headers": {"Retry-After": "7"}},
+        {"json": _SEARCH_EMPTY, "status_code": 200},
+    ])
+
+    assert client.search_notices(query="any") == _SEARCH_EMPTY
+    assert sleeps == [7.0]
+
+
+@pytest.mark.retry
+def test_retry_after_is_capped(monkeypatch, requests_mock):
+    """Test that an oversized Retry-After cannot stall the client."""
+    client = api.TEDAPIClient(max_retries=1)
+    sleeps = _virtual_time(monkeypatch, client)
+    requests_mock.post(SEARCH_URL, [
+        {"status_code": 429, "text": "Too Many Requests",
+         "headers": {"Retry-After": "86400"}},
+        {"json": _SEARCH_EMPTY, "status_code": 200},
+    ])
+
+    assert client.search_notices(query="any") == _SEARCH_EMPTY
+    assert sleeps == [api.MAX_BACKOFF_SECONDS]
 
 
 @pytest.mark.retry
@@ -222,15 +715,21 @@ def test_fetch_notices_rate_limit(monkeypatch):
     """Test that rate limiting enforces minimum interval."""
     client = api.TEDAPIClient(rate_limit_per_minute=60)
     times = []
+    now = [0.0]
+
+    def fake_sleep(seconds):
+        now[0] += seconds
 
     def fake_post(*args, **kwargs):
-        times.append(time.time())
+        times.append(client._clock())
 
         class FakeResponse:
             ok = True
-            def json(self): return {"notices": []}
+            content = b'{"notices": []}'
         return FakeResponse()
-    monkeypatch.setattr(requests, "post", fake_post)
+    monkeypatch.setattr(client, "_clock", lambda: now[0])
+    monkeypatch.setattr("analyzer.api.time.sleep", fake_sleep)
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     client.search_notices(query="test")
     client.search_notices(query="test")
@@ -239,68 +738,123 @@ def test_fetch_notices_rate_limit(monkeypatch):
 
 
 @pytest.mark.retry
-def test_fetch_notices_retry_limit(monkeypatch):
-    """Test that retries stop after max_retries."""
-    client = api.TEDAPIClient(max_retries=2)
+def test_rate_limit_allows_burst(monkeypatch, fake_post_factory):
+    """Test that up to `burst` requests are sent without waiting."""
+    client = api.TEDAPIClient(rate_limit_per_minute=60, burst=3)
+    sleeps = _virtual_time(monkeypatch, client)
+    monkeypatch.setattr(client.session, "post",
+                        fake_post_factory(json={"notices": []}))
+
+    for _ in range(4):
+        client.search_notices(query="test")
 
-    def fake_post(*args, **kwargs):
-        raise requests.exceptions.RequestException("fail")
-    monkeypatch.setattr(requests, "post", fake_post)
+    assert sleeps == [1.0]
 
-    with pytest.raises(api.TEDAPIError) as e:
+
+@pytest.mark.retry
+def test_rate_limit_backs_off_on_429_and_recovers(monkeypatch, requests_mock):
+    """Test that a 429 halves the request rate and successes restore it."""
+    client = api.TEDAPIClient(rate_limit_per_minute=60, max_retries=1)
+    sleeps = _virtual_time(monkeypatch, client)
+    requests_mock.post(SEARCH_URL, [
+        {"status_code": 429, "text": "Too Many Requests",
+         "headers": {"Retry-After": "0"}},
+        {"json": _SEARCH_EMPTY, "status_code": 200},
+    ])
+
+    client.search_notices(query="any")
+    # Retry-After, then one token at the halved rate of 0.5 requests/s
+    assert sleeps == [0.0, pytest.approx(2.0)]
+
+    for _ in range(5):
         client.search_notices(query="any")
-    assert "Max retries exceeded" in str(e.value)
+    assert client._rate_per_sec == pytest.approx(1.0)
+    assert sleeps[-1] == pytest.approx(1.0)
+
+
 # endregion
 
 # region Logging Tests
 
 
 @pytest.mark.api
-def test_fetch_notices_log_success(tmp_path, requests_mock):
+def test_fetch_notices_log_success(monkeypatch, fake_post_factory):
     """Test successful request logging."""
-    log_file = tmp_path / "log_success.txt"
-    client = api.TEDAPIClient(log_file=str(log_file))
+    handler = _ListHandler()
+    client = api.TEDAPIClient(log_handler=handler)
 
-    sample_response = {"notices": [{"id": "test"}]}
-    requests_mock.post(
-        "https://api.ted.europa.eu/v3/notices/search", json=sample_response)
+    monkeypatch.setattr(client.session, "post",
+                        fake_post_factory(json={"notices": [{"id": "test"}]}))
 
     client.search_notices(query="test")
+    client.close()
 
-    logs = log_file.read_text()
-    assert "SUCCESS" in logs
+    assert any("SUCCESS" in r.getMessage() for r in handler.records)
 
 
 @pytest.mark.api
-def test_fetch_notices_log_append_only(tmp_path, requests_mock):
+def test_fetch_notices_log_append_only(tmp_path, monkeypatch, fake_post_factory):
     """Test that logs are appended, not overwritten."""
     log_file = tmp_path / "log_append.txt"
     client = api.TEDAPIClient(log_file=str(log_file))
 
-    requests_mock.post("https://api.ted.europa.eu/v3/notices/search",
-                       json={"notices": [{"id": "test1"}]})
+    monkeypatch.setattr(client.session, "post",
+                        fake_post_factory(json={"notices": [{"id": "test1"}]}))
     client.search_notices(query="test")
 
-    requests_mock.post("https://api.ted.europa.eu/v3/notices/search",
-                       json={"notices": [{"id": "test2"}]})
+    monkeypatch.setattr(client.session, "post",
+                        fake_post_factory(json={"notices": [{"id": "test2"}]}))
     client.search_notices(query="test2")
+    client.close()
 
     logs = log_file.read_text()
     assert logs.count("SUCCESS") == 2
 
 
 @pytest.mark.api
-def test_fetch_notices_log_abnormal_response(tmp_path, requests_mock):
+def test_fetch_notices_log_abnormal_response(monkeypatch, fake_post_factory):
     """Test error logging when API returns error."""
-    log_file = tmp_path / "log_error.txt"
-    client = api.TEDAPIClient(log_file=str(log_file))
+    handler = _ListHandler()
+    client = api.TEDAPIClient(log_handler=handler)
+    _skip_backoff(monkeypatch, client)
 
-    requests_mock.post("https://api.ted.europa.eu/v3/notices/search",
-                       status_code=503, text="Server Error")
+    monkeypatch.setattr(client.session, "post",
+                        fake_post_factory(status_code=503, text="Server Error"))
 
     with pytest.raises(api.TEDAPIError):
         client.search_notices(query="test")
+    client.close()
 
-    logs = log_file.read_text()
-    assert "ERROR" in logs and "503" in logs
+    assert any(r.levelname == "ERROR" and "503" in r.getMessage()
+               for r in handler.records)
+
+
+@pytest.mark.api
+def test_closed_clients_do_not_leave_log_handlers_behind(tmp_path):
+    """Test that clients sharing a log file share one handler, removed on close."""
+    first = api.TEDAPIClient(log_file=str(tmp_path / "shared.log"))
+    second = api.TEDAPIClient(log_file=str(tmp_path / "shared.log"))
+    logger = first.logger
+    assert second.logger is logger
+    assert len(logger.handlers) == 1
+
+    first.close()
+    second.close()
+    assert logger.handlers == []
+
+
+@pytest.mark.api
+def test_client_logs_do_not_reach_other_clients_handlers():
+    """Test that each client's records go only to its own handler."""
+    first_handler, second_handler = _ListHandler(), _ListHandler()
+    first = api.TEDAPIClient(log_handler=first_handler)
+    second = api.TEDAPIClient(log_handler=second_handler)
+
+    first.logger.info("from first")
+    second.logger.info("from second")
+    first.close()
+    second.close()
+
+    assert [r.getMessage() for r in first_handler.records] == ["from first"]
+    assert [r.getMessage() for r in second_handler.records] == ["from second"]
 # endregion
@@ -1,52 +1,51 @@
 import pytest
-from click.testing import CliRunner
 from analyzer.cli import cli
 import pandas as pd
 
 
 @pytest.mark.cli
-def test_fetch_missing_required_arg():
-    """fetch fails without required start/end dates."""
-    runner = CliRunner()
-    result = runner.invoke(cli, ["fetch"])
+@pytest.mark.parametrize("argv, needle", [
+    (["fetch"], "Missing option"),
+    (["list-outliers"], "Missing option '--input'"),
+])
+def test_missing_required_option(cli_runner, argv, needle):
+    """Commands fail with a usage error when a required option is missing."""
+    result = cli_runner.invoke(cli, argv)
     assert result.exit_code != 0
-    assert "Missing option" in result.output
+    assert needle in result.output
 
 
 @pytest.mark.cli
-def test_sync_command_invokes_scheduler(monkeypatch):
+def test_sync_command_invokes_scheduler(cli_runner, monkeypatch):
     """sync should call start_scheduler()."""
-    runner = CliRunner()
     monkeypatch.setattr("analyzer.sync.start_scheduler",
                         lambda **kwargs: print("[stub] scheduler launched"))
 
-    result = runner.invoke(cli, ["sync"])
+    result = cli_runner.invoke(cli, ["sync"])
     assert result.exit_code == 0
     assert "[stub] scheduler launched" in result.output
 
 
 @pytest.mark.cli
-def test_detect_outliers_fails_with_too_little_data(monkeypatch):
+def test_detect_outliers_fails_with_too_little_data(cli_runner, fast_monkey):
     """detect-outliers should fail gracefully with insufficient data."""
-    runner = CliRunner()
-
     # Simulate minimal data
-    monkeypatch.setattr("analyzer.arima.prepare_monthly_counts",
+    fast_monkey.setattr("analyzer.arima.prepare_monthly_counts",
                         lambda df: pd.Series([1, 2], index=pd.date_range("2020-01-01", periods=2, freq="MS")))
 
     # Simulate ARIMA error
-    monkeypatch.setattr("analyzer.arima.train_and_forecast_arima",
+    fast_monkey.setattr("analyzer.arima.train_and_forecast_arima",
                         lambda series, **kwargs: (_ for _ in ()).throw(ValueError("Insufficient data for training")))
 
     # Bypass database access and simulate chunked iterator
-    monkeypatch.setattr("pandas.read_sql_table",
+    fast_monkey.setattr("pandas.read_sql_table",
                         lambda table, con, **kwargs: iter([
                             pd.DataFrame({"publication-date": ["2020-01-01"]}),
                             pd.DataFrame({"publication-date": ["2020-02-01"]})
                         ])
                         )
 
-    result = runner.invoke(cli, [
+    result = cli_runner.invoke(cli, [
         "detect-outliers",
         "--output", "csv"
     ])
@@ -56,21 +55,27 @@ def test_detect_outliers_fails_with_too_little_data(monkeypatch):
 
 
 @pytest.mark.cli
-def test_list_outliers_requires_input():
-    """list-outliers fails if --input not provided."""
-    runner = CliRunner()
-    result = runner.invoke(cli, ["list-outliers"])
-    assert result.exit_code != 0
-    assert "Missing option '--input'" in result.output
-
-
-@pytest.mark.cli
-def test_list_outliers_file_not_found():
+def test_list_outliers_file_not_found(cli_runner):
     """list-outliers should show error message if file doesn't exist."""
-    runner = CliRunner()
-    result = runner.invoke(cli, [
+    result = cli_runner.invoke(cli, [
         "list-outliers",
         "--input", "nonexistent.json"
     ])
     assert result.exit_code == 0
     assert "not found" in result.output
+
+
+@pytest.mark.cli
+def test_preprocess_reads_quoted_multiline_csv(cli_runner, tmp_path):
+    """preprocess should parse quoted CSV fields spanning several lines."""
+    input_file = tmp_path / "notices.csv"
+    input_file.write_text(
+        'publication-number,title\n'
+        'P1,"multi\nline, with ""quotes"""\n'
+        'P2,plain\n', encoding="utf-8")
+
+    result = cli_runner.invoke(cli, [
+        "preprocess", "--input", str(input_file), "--output", "none"])
+
+    assert result.exit_code == 0
+    assert "Processed 2 records" in result.output
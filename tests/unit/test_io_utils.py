@@ -0,0 +1,10 @@
+from analyzer.io_utils import csv_column_values
+
+
+def test_csv_column_values_reads_one_column(tmp_path):
+    """Only the requested column is collected; a missing column yields nothing."""
+    path = tmp_path / "notices.csv"
+    path.write_text("title,publication-number\nA,PUB1\nB,PUB2\nC,PUB1\n",
+                    encoding="utf-8")
+    assert csv_column_values(str(path), "publication-number") == {"PUB1", "PUB2"}
+    assert csv_column_values(str(path), "missing") == set()
@@ -1,31 +1,33 @@
 import pytest
 import pandas as pd
 import numpy as np
-from analyzer.preprocessing import preprocess_notices
+from analyzer.preprocessing import (preprocess_notices, impute_numerics, handle_categorical_data,
+                                    extract_first_category, _first_category)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def raw_data():
+    # Columns are built as typed arrays so the DataFrame skips dtype inference
     return pd.DataFrame({
-        'contract-nature': [['services'], ['works'], ['supplies'], ['services'], ['works']],
-        'classification-cpv': ['79970000', np.nan, '71200000', '72000000', '30100000'],
-        'dispatch-date': ['2024-01-01T10:00:00', '2024-01-15T09:30:00', '2024-02-01T12:00:00', '2024-03-12T08:45:00', '2024-04-01T11:00:00'],
-        'tender-value-lowest': [700000.0, 450000.0, 320000.0, 980000.0, 600000.0],
-        'tender-value': [850000.0, 500000.0, 400000.0, np.nan, 650000.0],
-        'publication-date': ['2024-01-02T10:00:00', '2024-01-16T09:30:00', '2024-02-02T12:00:00', '2024-03-13T08:45:00', '2024-04-02T11:00:00'],
-        'notice-type': [['cn-standard'], ['can-social'], None, ['pin-only'], ['can-standard']],
-        'recurrence-lot': ['Y', 'N', 'Y', 'N', 'Y'],
-        'buyer-country': [['DEU'], ['FRA'], ['ITA'], None, ['ESP']],
-        'main-activity': [['education'], ['defence'], ['gen-pub'], ['rail'], ['health']],
-        'duration-period-value-lot': [12, 24, 18, 6, 9],
-        'term-performance-lot': [np.nan, 'Urgent', 'Standard', 'Long-Term', 'Short-Term'],
-        'TV_CUR': ['EUR', 'EUR', 'EUR', 'EUR', 'EUR'],
-        'renewal-maximum-lot': ['1', '0', '1', '0', np.nan],
-        'TVH': [850000.0, 500000.0, 400000.0, 1000000.0, 650000.0]
+        'contract-nature': pd.array([['services'], ['works'], ['supplies'], ['services'], ['works']], dtype=object),
+        'classification-cpv': pd.array(['79970000', np.nan, '71200000', '72000000', '30100000'], dtype="string"),
+        'dispatch-date': pd.array(['2024-01-01T10:00:00', '2024-01-15T09:30:00', '2024-02-01T12:00:00', '2024-03-12T08:45:00', '2024-04-01T11:00:00'], dtype="string"),
+        'tender-value-lowest': pd.array([700000.0, 450000.0, 320000.0, 980000.0, 600000.0], dtype="float64"),
+        'tender-value': pd.array([850000.0, 500000.0, 400000.0, np.nan, 650000.0], dtype="float64"),
+        'publication-date': pd.array(['2024-01-02T10:00:00', '2024-01-16T09:30:00', '2024-02-02T12:00:00', '2024-03-13T08:45:00', '2024-04-02T11:00:00'], dtype="string"),
+        'notice-type': pd.array([['cn-standard'], ['can-social'], None, ['pin-only'], ['can-standard']], dtype=object),
+        'recurrence-lot': pd.Categorical(['Y', 'N', 'Y', 'N', 'Y']),
+        'buyer-country': pd.array([['DEU'], ['FRA'], ['ITA'], None, ['ESP']], dtype=object),
+        'main-activity': pd.array([['education'], ['defence'], ['gen-pub'], ['rail'], ['health']], dtype=object),
+        'duration-period-value-lot': pd.array([12, 24, 18, 6, 9], dtype="int16"),
+        'term-performance-lot': pd.array([np.nan, 'Urgent', 'Standard', 'Long-Term', 'Short-Term'], dtype="string"),
+        'TV_CUR': pd.Categorical(['EUR', 'EUR', 'EUR', 'EUR', 'EUR']),
+        'renewal-maximum-lot': pd.array(['1', '0', '1', '0', np.nan], dtype="string"),
+        'TVH': pd.array([850000.0, 500000.0, 400000.0, 1000000.0, 650000.0], dtype="float64")
     })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def empty_data():
     return pd.DataFrame(columns=[
         "contract-nature",
@@ -80,3 +82,46 @@ def test_categorical_columns_are_encoded(raw_data):
                for col in processed.columns), "One-hot encoding for notice-type missing"
     assert any(col.startswith("main-activity_")
                for col in processed.columns), "One-hot encoding for main-activity missing"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (['cn-standard'], "Others"),
+    ("['cn-standard', 'pin-only']", "cn-standard"),
+    (' ["pin-only"] ', "pin-only"),
+    (' cn-standard ', "cn-standard"),
+    ("[1, 2]", "1"),
+    ("[[1, 2], 3]", "[1, 2]"),
+    ("[]", "[]"),
+    ("['a', b]", "['a', b]"),
+    ("['a\\'b']", "a'b"),
+    ("5", "5"),
+    (5, "Others"),
+    (np.nan, "Others"),
+    (None, "Others"),
+    (pd.NA, "Others"),
+])
+def test_extract_first_category_matches_row_wise_parsing(value, expected):
+    series = pd.Series([value, "plain"], dtype=object)
+    result = extract_first_category(series)
+    assert result.tolist() == [expected, "plain"]
+    assert result.tolist() == series.map(_first_category).tolist()
+
+
+def test_rare_categories_are_grouped_as_others():
+    df = pd.DataFrame({'buyer-country': ['DEU', 'DEU', 'FRA', 'ITA', 'DEU', 'FRA']})
+    encoded = handle_categorical_data(df, top_n=2)
+    assert list(encoded.columns) == [
+        'buyer-country_DEU', 'buyer-country_FRA', 'buyer-country_Others']
+    assert encoded['buyer-country_Others'].tolist() == [
+        False, False, False, True, False, False]
+
+
+def test_impute_numerics_fills_with_column_mean():
+    df = pd.DataFrame({
+        'tender-value': ['100', None, '300'],
+        'TVH': [1.0, np.nan, 3.0],
+    })
+    imputed = impute_numerics(df)
+    assert imputed['tender-value'].tolist() == [100.0, 200.0, 300.0]
+    assert imputed['TVH'].tolist() == [1.0, 2.0, 3.0]
+    assert imputed['tender-value-lowest'].tolist() == [0.0, 0.0, 0.0]
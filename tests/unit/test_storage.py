@@ -1,9 +1,23 @@
+import csv
+import io
+import threading
+import time
+import psycopg2.pool
 import pytest
 import pandas as pd
 from unittest.mock import patch, MagicMock
 from analyzer import storage
 
 
+@pytest.fixture(autouse=True)
+def _clear_schema_cache():
+    storage._schema_cache.clear()
+    storage._POOLS.clear()
+    yield
+    storage._schema_cache.clear()
+    storage._POOLS.clear()
+
+
 @pytest.mark.storage
 def test_store_dataframe_creates_table_if_missing():
     """Ensure CREATE TABLE IF NOT EXISTS is executed with all columns as TEXT."""
@@ -13,13 +27,13 @@ def test_store_dataframe_creates_table_if_missing():
     db_config = {"host": "localhost", "user": "test",
                  "password": "test", "dbname": "testdb"}
 
-    with patch("psycopg2.connect") as mock_connect:
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool:
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_cursor.connection.encoding = "UTF8"
         mock_cursor.mogrify.side_effect = lambda template, args: b"(" + b",".join(
             str(a).encode() for a in args) + b")"
-        mock_connect.return_value = mock_conn
+        mock_pool.return_value.getconn.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         mock_cursor.fetchall.return_value = [
             ("col1",)]  # simulate existing column
@@ -33,28 +47,31 @@ def test_store_dataframe_creates_table_if_missing():
 
 @pytest.mark.storage
 def test_store_dataframe_adds_missing_columns():
-    """Verify ALTER TABLE is used to add missing columns."""
+    """Verify a single ALTER TABLE adds all missing columns."""
     df = pd.DataFrame([
-        {"publication-number": "test-002", "a": "x", "b": "y"}
+        {"publication-number": "test-002", "a": "x", "b": "y", "c": "z"}
     ])
     db_config = {"host": "localhost", "user": "test",
                  "password": "test", "dbname": "testdb"}
 
-    with patch("psycopg2.connect") as mock_connect:
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool:
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_cursor.connection.encoding = "UTF8"
         mock_cursor.mogrify.side_effect = lambda template, args: b"(" + b",".join(
             str(a).encode() for a in args) + b")"
-        mock_connect.return_value = mock_conn
+        mock_pool.return_value.getconn.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
-        mock_cursor.fetchall.return_value = [("a",)]  # Only 'a' exists
+        mock_cursor.fetchall.return_value = [
+            ("publication-number",), ("a",)]  # 'b' and 'c' are missing
 
         storage.store_dataframe_to_postgres(df, "foo", db_config)
 
-        alter_call = any(
-            "ALTER TABLE foo ADD COLUMN" in call[0][0] for call in mock_cursor.execute.call_args_list)
-        assert alter_call, "Missing columns should trigger ALTER TABLE."
+        alters = [call[0][0] for call in mock_cursor.execute.call_args_list
+                  if isinstance(call[0][0], str) and "ALTER TABLE" in call[0][0]]
+        assert alters == [
+            'ALTER TABLE foo ADD COLUMN IF NOT EXISTS "b" TEXT, '
+            'ADD COLUMN IF NOT EXISTS "c" TEXT;']
 
 
 @pytest.mark.storage
@@ -66,14 +83,14 @@ def test_store_dataframe_inserts_text_values():
 
     db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
 
-    with patch("psycopg2.connect") as mock_connect, \
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool, \
             patch("analyzer.storage.execute_values") as mock_exec:
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
         mock_cursor.connection.encoding = "UTF8"
         mock_cursor.mogrify.side_effect = lambda template, args: b"(" + b",".join(
             str(a).encode() for a in args) + b")"
-        mock_connect.return_value = mock_conn
+        mock_pool.return_value.getconn.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         mock_cursor.fetchall.return_value = [("colA", "colB")]
 
@@ -82,4 +99,190 @@ def test_store_dataframe_inserts_text_values():
         # Retrieve the query passed to execute_values
         _, query, values = mock_exec.call_args[0]
         assert 'INSERT INTO my_table ("publication-number", "colA", "colB")' in query
-        assert values == [("test-002", "123", "True")]
+        assert list(values) == [("test-002", "123", "True")]
+        assert mock_exec.call_args.kwargs.get("page_size") == 1000
+        assert mock_exec.call_args.kwargs.get("template") == "(%s,%s,%s)"
+
+
+@pytest.mark.storage
+def test_store_dataframe_copies_large_frames():
+    """Large frames are streamed through COPY instead of execute_values."""
+    n = storage.COPY_MIN_ROWS
+    df = pd.DataFrame({
+        "publication-number": [f"pub-{i}" for i in range(n)],
+        "title": ['say "hi", twice'] + [None] * (n - 1),
+    })
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+    copied = {}
+
+    def fake_copy(sql, stream, size=8192):
+        copied["sql"] = sql
+        copied["text"] = "".join(iter(lambda: stream.read(size), ""))
+
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool, \
+            patch("analyzer.storage.execute_values") as mock_exec:
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("publication-number",), ("title",)]
+        mock_cursor.copy_expert.side_effect = fake_copy
+        mock_pool.return_value.getconn.return_value.cursor.return_value = mock_cursor
+
+        storage.store_dataframe_to_postgres(df, "big", db_config)
+
+    mock_exec.assert_not_called()
+    assert copied["sql"].startswith('COPY big ("publication-number", "title") FROM STDIN')
+    rows = list(csv.reader(io.StringIO(copied["text"])))
+    assert len(rows) == n
+    assert rows[0] == ["pub-0", 'say "hi", twice']
+    assert rows[-1] == [f"pub-{n - 1}", storage.COPY_NULL]
+
+
+@pytest.mark.storage
+def test_store_dataframe_caches_table_schema():
+    """Repeated inserts into a known table skip the schema round trips."""
+    df = pd.DataFrame([{"publication-number": "p1", "a": "x"}])
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool, \
+            patch("analyzer.storage.execute_values"):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("publication-number",), ("a",)]
+        mock_pool.return_value.getconn.return_value.cursor.return_value = mock_cursor
+
+        storage.store_dataframe_to_postgres(df, "cached", db_config)
+        assert mock_cursor.execute.call_count == 1  # CREATE + column lookup
+
+        mock_cursor.execute.reset_mock()
+        storage.store_dataframe_to_postgres(df.assign(b="y"), "cached", db_config)
+
+    statements = [c[0][0] for c in mock_cursor.execute.call_args_list]
+    assert statements == ['ALTER TABLE cached ADD COLUMN IF NOT EXISTS "b" TEXT;']
+
+
+@pytest.mark.storage
+def test_store_dataframe_forgets_cached_schema_on_error():
+    """A failed store drops the table's cached columns so the next one looks them up again."""
+    df = pd.DataFrame([{"publication-number": "p1", "a": "x"}])
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool, \
+            patch("analyzer.storage.execute_values", side_effect=RuntimeError("boom")):
+        mock_cursor = mock_pool.return_value.getconn.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = [("publication-number",), ("a",)]
+
+        with pytest.raises(RuntimeError):
+            storage.store_dataframe_to_postgres(df, "flaky", db_config)
+
+    assert storage._schema_cache == {}
+
+
+@pytest.mark.storage
+def test_store_dataframe_reuses_pooled_connection():
+    """Stores against the same database share one pool and return the connection."""
+    df = pd.DataFrame([{"publication-number": "p1", "a": "x"}])
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool, \
+            patch("analyzer.storage.execute_values"):
+        pool = mock_pool.return_value
+        pool.getconn.return_value.cursor.return_value.fetchall.return_value = [
+            ("publication-number",), ("a",)]
+
+        storage.store_dataframe_to_postgres(df, "pooled", db_config)
+        storage.store_dataframe_to_postgres(df, "pooled", dict(db_config))
+
+    mock_pool.assert_called_once_with(1, storage.POOL_MAX_CONN, **db_config)
+    assert pool.getconn.call_count == 2
+    assert pool.putconn.call_count == 2
+    pool.getconn.return_value.close.assert_not_called()
+
+
+@pytest.mark.storage
+def test_store_dataframe_replaces_dead_pooled_connection():
+    """A pooled connection dropped while idle is discarded and a fresh one used."""
+    df = pd.DataFrame([{"publication-number": "p1", "a": "x"}])
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+    dead, live = MagicMock(), MagicMock()
+    dead.cursor.return_value.__enter__.return_value.execute.side_effect = \
+        psycopg2.OperationalError("server closed the connection unexpectedly")
+    live.cursor.return_value.fetchall.return_value = [("publication-number",), ("a",)]
+
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool, \
+            patch("analyzer.storage.execute_values") as mock_insert:
+        pool = mock_pool.return_value
+        pool.getconn.side_effect = [dead, live]
+
+        storage.store_dataframe_to_postgres(df, "stale", db_config)
+
+    pool.putconn.assert_any_call(dead, close=True)
+    pool.putconn.assert_called_with(live)
+    assert mock_insert.call_args[0][0] is live.cursor.return_value
+    live.commit.assert_called_once()
+
+
+@pytest.mark.storage
+def test_store_dataframe_noop_on_empty():
+    """Frames with no storable rows never touch the database."""
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+
+    with patch("psycopg2.pool.ThreadedConnectionPool") as mock_pool:
+        storage.store_dataframe_to_postgres(
+            pd.DataFrame(columns=["publication-number", "a"]), "empty", db_config)
+        storage.store_dataframe_to_postgres(
+            pd.DataFrame([{"publication-number": None, "a": "x"}]), "empty", db_config)
+
+    mock_pool.assert_not_called()
+
+
+class _StrictPool:
+    """Stand-in for ThreadedConnectionPool that, like it, raises once exhausted."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.maxconn = maxconn
+        self.checked_out = 0
+        self.lock = threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            if self.checked_out >= self.maxconn:
+                raise psycopg2.pool.PoolError("connection pool exhausted")
+            self.checked_out += 1
+        conn = MagicMock()
+        conn.cursor.return_value.fetchall.return_value = [
+            ("publication-number",), ("a",)]
+        return conn
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.checked_out -= 1
+
+
+@pytest.mark.storage
+def test_store_dataframe_waits_for_a_free_connection(monkeypatch):
+    """Concurrent stores beyond the pool size wait instead of raising PoolError."""
+    monkeypatch.setattr(storage, "POOL_MAX_CONN", 1)
+    df = pd.DataFrame([{"publication-number": "p1", "a": "x"}])
+    db_config = {"host": "x", "user": "x", "password": "x", "dbname": "x"}
+    first_inside = threading.Event()
+    errors = []
+
+    def slow_insert(*args, **kwargs):
+        first_inside.set()
+        time.sleep(0.2)  # hold the only connection while the second store starts
+
+    def store():
+        try:
+            storage.store_dataframe_to_postgres(df, "busy", db_config)
+        except Exception as e:
+            errors.append(e)
+
+    with patch("psycopg2.pool.ThreadedConnectionPool", _StrictPool), \
+            patch("analyzer.storage.execute_values", side_effect=slow_insert):
+        first = threading.Thread(target=store)
+        first.start()
+        assert first_inside.wait(timeout=5)
+        second = threading.Thread(target=store)
+        second.start()
+        first.join()
+        second.join()
+
+    assert errors == []
@@ -1,13 +1,16 @@
 import pytest
 import pandas as pd
+import csv
 import json
 from analyzer import sync
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 
 @pytest.mark.sync
-def test_sync_once_success_csv(tmp_path, requests_mock):
+def test_sync_once_success_csv(tmp_path, requests_mock, monkeypatch):
     """Test successful sync_once saving data to CSV."""
+    # sync_once keeps its checkpoint token in the working directory
+    monkeypatch.chdir(tmp_path)
     output_file = tmp_path / "notices_sync.csv"
     last_sync_file = tmp_path / ".last_sync"
 
@@ -35,14 +38,16 @@ def test_sync_once_success_csv(tmp_path, requests_mock):
     expected_timestamp = datetime.now(timezone.utc).strftime("%Y%m%d")
     assert saved_timestamp == expected_timestamp
 
-    df = pd.read_csv(output_file)
-    assert "publication-number" in df.columns
-    assert set(df["publication-number"]) == {"PUB1"}
+    with open(output_file, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert {r["publication-number"] for r in rows} == {"PUB1"}
 
 
 @pytest.mark.sync
-def test_sync_once_success_json(tmp_path, requests_mock):
+def test_sync_once_success_json(tmp_path, requests_mock, monkeypatch):
     """Test successful sync_once saving data to JSON."""
+    # sync_once keeps its checkpoint token in the working directory
+    monkeypatch.chdir(tmp_path)
     output_file = tmp_path / "notices_sync.json"
     last_sync_file = tmp_path / ".last_sync"
 
@@ -77,8 +82,10 @@ def test_sync_once_success_json(tmp_path, requests_mock):
 
 
 @pytest.mark.sync
-def test_sync_once_api_failure(tmp_path, requests_mock):
+def test_sync_once_api_failure(tmp_path, requests_mock, monkeypatch):
     """Test sync_once handles API failure cleanly."""
+    # sync_once keeps its checkpoint token in the working directory
+    monkeypatch.chdir(tmp_path)
     output_file = tmp_path / "notices_sync.csv"
     last_sync_file = tmp_path / ".last_sync"
 
@@ -100,8 +107,10 @@ def test_sync_once_api_failure(tmp_path, requests_mock):
 
 
 @pytest.mark.sync
-def test_sync_once_saves_to_postgres(tmp_path, requests_mock):
+def test_sync_once_saves_to_postgres(tmp_path, requests_mock, monkeypatch):
     """Test sync_once triggers DB store if db_url and table are provided."""
+    # sync_once keeps its checkpoint token in the working directory
+    monkeypatch.chdir(tmp_path)
     last_sync_file = tmp_path / ".last_sync"
 
     url = "https://api.ted.europa.eu/v3/notices/search"
@@ -136,3 +145,80 @@ def test_sync_once_saves_to_postgres(tmp_path, requests_mock):
         assert isinstance(args[0], pd.DataFrame)
         assert args[1] == "notices"
         assert isinstance(args[2], dict)
+
+
+@pytest.mark.sync
+def test_sync_once_reuses_given_client(tmp_path):
+    """Test sync_once uses the client passed in instead of creating one."""
+    last_sync_file = tmp_path / ".last_sync"
+    client = MagicMock()
+    client.build_query.return_value = "query"
+
+    with patch("analyzer.sync.TEDAPIClient") as mock_client_cls:
+        sync.sync_once(
+            start_days_ago=7,
+            output_format="none",
+            last_sync_file=str(last_sync_file),
+            client=client
+        )
+
+    assert not mock_client_cls.called
+    assert client.fetch_all_scroll.called
+    assert last_sync_file.exists()
+
+
+@pytest.mark.sync
+def test_sync_once_advances_sync_point_when_scroll_fails(tmp_path, requests_mock, monkeypatch):
+    """Test a scroll that fails midway keeps the sync point of the pages it stored."""
+    # The interrupted scroll leaves its checkpoint token in the working directory
+    monkeypatch.chdir(tmp_path)
+    last_sync_file = tmp_path / ".last_sync"
+    from datetime import datetime, timedelta, timezone
+    now = datetime.now(timezone.utc)
+    first_date = now - timedelta(days=3)
+    page_date = now - timedelta(days=2)
+
+    url = "https://api.ted.europa.eu/v3/notices/search"
+    requests_mock.post(url, [
+        {"json": {"notices": [
+            {"publication-number": "PUB1",
+             "dispatch-date": first_date.strftime("%Y-%m-%d+01:00")},
+            {"publication-number": "PUB2",
+             "dispatch-date": page_date.strftime("%Y-%m-%d+01:00")}],
+            "iterationNextToken": "TOKEN123"}, "status_code": 200},
+        {"text": "Service Unavailable", "status_code": 503},
+    ])
+
+    with patch("time.sleep", return_value=None):
+        sync.sync_once(
+            start_days_ago=7,
+            output_format="none",
+            last_sync_file=str(last_sync_file)
+        )
+
+    assert requests_mock.request_history[0].json()["query"].endswith(
+        "SORT BY dispatch-date ASC")
+    assert last_sync_file.read_text(encoding="utf-8") == page_date.strftime("%Y%m%d")
+
+
+@pytest.mark.sync
+def test_start_scheduler_sleeps_until_next_job():
+    """Test the scheduler sleeps for the full idle time instead of polling."""
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise KeyboardInterrupt
+
+    with patch("analyzer.sync.sync_once") as mock_sync, \
+            patch("analyzer.sync.TEDAPIClient"), \
+            patch("analyzer.sync.time.sleep", side_effect=fake_sleep):
+        try:
+            with pytest.raises(KeyboardInterrupt):
+                sync.start_scheduler(interval_minutes=60)
+        finally:
+            sync.schedule.clear()
+
+    assert mock_sync.call_count == 1
+    assert all(s > 3500 for s in sleeps)
@@ -2,6 +2,7 @@ import os
 import tempfile
 import pandas as pd
 import pytest
+import matplotlib.pyplot as plt
 from analyzer.visualization import plot_forecast_results
 
 
@@ -24,3 +25,4 @@ def test_plot_forecast_results_creates_file():
 
         assert os.path.exists(plot_path), "Plot file was not created"
         assert os.path.getsize(plot_path) > 0, "Plot file is empty"
+        assert plt.get_fignums() == [], "Saving should not leave pyplot figures open"